@@ -18,12 +18,15 @@ def create_graph(csv_file):
 
     return graph, stations
 
-def find_shortest_path(graph, stations, start, end):
+def find_shortest_path(graph, stations, start, end, cache=None):
     # Starting an empty path and setting the current node to the end station
     path, current = [], stations[end]
 
-    # Applying Dijkstra's algorithm to find the shortest path
-    distances, predecessors = dijkstra(graph, stations[start])
+    # Applying Dijkstra's algorithm to find the shortest path, reusing a cached tree when given a ShortestPathTreeCache
+    if cache is None:
+        distances, predecessors = dijkstra(graph, stations[start])
+    else:
+        distances, predecessors = cache.get(stations[start])
 
     # Backtracking from the end station to the start station
     while current != None:
@@ -1,7 +1,9 @@
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
 from dijkstra import dijkstra
 from adjacency_list_graph import AdjacencyListGraph
+from journey_statistics import journey_time_histogram
+from journey_report import export_histograms
 
 def create_graph(csv_file):
     # Reading the CSV file into a DataFrame
@@ -36,21 +38,31 @@ def find_shortest_path(graph, stations, start, end):
     return path, distances[stations[end]]
 
 def calculate_all_journey_times(graph, stations):
-    journey_times = []
-    for start_idx in stations.values():
-        distances, _ = dijkstra(graph, start_idx)
-        journey_times.extend(distances)
-    return journey_times
+    # Aggregating each row of distances as it is produced, instead of keeping every journey time
+    rows = ((start_idx, dijkstra(graph, start_idx)[0]) for start_idx in stations.values())
+    return journey_time_histogram(rows)
 
 
-def plot_histogram(journey_times):
-    plt.hist(journey_times, bins=range(0, max(journey_times) + 1, 5), edgecolor='black')
+def plot_histogram(journey_times, outputs=()):
+    # Re-binning the aggregated counts into 5-minute bins
+    bins = range(0, int(journey_times.get_max()) + 1, 5)
+    counts = journey_times.histogram(bins)
+
+    # Writing the histogram to files (CSV, JSON, PNG or SVG) without needing a display
+    if outputs:
+        export_histograms(outputs, bins, {'Station Pairs': counts},
+                          titles=['Histogram of Journey Times Between Station Pairs'],
+                          xlabel='Journey Time in Minutes', ylabel='Number of Station Pairs')
+        return
+
+    import matplotlib.pyplot as plt
+    plt.hist(bins[:-1], bins=bins, weights=counts, edgecolor='black')
     plt.title('Histogram of Journey Times Between Station Pairs')
     plt.xlabel('Journey Time in Minutes')
     plt.ylabel('Number of Station Pairs')
     plt.show()
 
-def main():
+def main(outputs=()):
     graph, stations = create_graph('london_underground_graph.csv')
 
     # I am no longer using the code below so I have put it in comments
@@ -60,7 +72,8 @@ def main():
 
     # Calculating journey times for all station pairs and plotting the histogram
     all_journey_times = calculate_all_journey_times(graph, stations)
-    plot_histogram(all_journey_times)
+    plot_histogram(all_journey_times, outputs)
 
 if __name__ == "__main__":
-    main()
+    # Any file names given on the command line receive the histogram instead of a window
+    main(sys.argv[1:])
@@ -1,7 +1,8 @@
+import sys
 import pandas as pd
 from dijkstra import dijkstra
 from adjacency_list_graph import AdjacencyListGraph
-import matplotlib.pyplot as plt
+from journey_report import export_histograms, histogram_from_values
 
 def load_london_underground_graph(csv_file):
     # Load station data from the spreadsheet, creating a list of all stations.
@@ -60,20 +61,30 @@ def analyze_journeys(graph, station_index):
 
     return journey_counts
 
-def main():
+def main(outputs=()):
     # Load the graph with London Underground data.
     csv_file = 'london_underground_graph.csv'
     graph, station_index = load_london_underground_graph(csv_file)
     # Analyze all journeys and get their stop counts.
     journey_counts = analyze_journeys(graph, station_index)
+    # Count the journeys with each number of stops in one pass.
+    bins, counts = histogram_from_values(journey_counts)
+
+    # Write the histogram to any output files (CSV, JSON, PNG or SVG), which needs no display.
+    if outputs:
+        export_histograms(outputs, bins, {'Station Pairs': counts},
+                          titles=['Histogram of Journey Counts Between Stations'],
+                          xlabel='Number of Stops', ylabel='Number of Station Pairs')
+        return
 
     # Plot a histogram of the journey counts.
-    plt.hist(journey_counts, bins=range(max(journey_counts)+1), edgecolor='black')
+    import matplotlib.pyplot as plt
+    plt.hist(bins[:-1], bins=bins, weights=counts, edgecolor='black')
     plt.title('Histogram of Journey Counts Between Stations')
     plt.xlabel('Number of Stops')
     plt.ylabel('Number of Station Pairs')
     plt.show()
 
-# Execute the main function to run the program.
+# Execute the main function to run the program; file names on the command line receive the histogram.
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
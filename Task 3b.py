@@ -1,7 +1,8 @@
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
 from bellman_ford import bellman_ford
 from adjacency_list_graph import AdjacencyListGraph
+from journey_report import export_histograms, histogram_from_values
 
 def load_london_underground_graph(csv_file):
     # Reading station data from the spreadsheet.
@@ -58,7 +59,7 @@ def find_shortest_path(graph, station_index, start_station, end_station):
 
     return path, num_stops
 
-def generate_histogram(graph, station_index):
+def generate_histogram(graph, station_index, outputs=()):
     journey_counts = []
 
     # Going through each possible station pair for analysis.
@@ -71,20 +72,31 @@ def generate_histogram(graph, station_index):
                     # Recording the number of stops for each journey.
                     journey_counts.append(num_stops)
 
+    # Counting the journeys with each number of stops in one pass.
+    bins, counts = histogram_from_values(journey_counts)
+
+    # Writing the histogram to any output files (CSV, JSON, PNG or SVG), which needs no display.
+    if outputs:
+        export_histograms(outputs, bins, {'Station Pairs': counts},
+                          titles=['Histogram of Journey Counts Between Stations'],
+                          xlabel='Number of Stops', ylabel='Number of Station Pairs')
+        return
+
     # Creating a histogram to visualize the frequency of journey lengths.
-    plt.hist(journey_counts, bins=range(max(journey_counts)+1), edgecolor='black')
+    import matplotlib.pyplot as plt
+    plt.hist(bins[:-1], bins=bins, weights=counts, edgecolor='black')
     plt.title('Histogram of Journey Counts Between Stations')
     plt.xlabel('Number of Stops')
     plt.ylabel('Number of Station Pairs')
     plt.show()
 
-def main():
+def main(outputs=()):
     # Load the station data and prepare the graph.
     csv_file = 'london_underground_graph.csv'
     graph, station_index = load_london_underground_graph(csv_file)
-    # Generate and display the histogram of journey counts.
-    generate_histogram(graph, station_index)
+    # Generate the histogram of journey counts, displaying it unless output files are given.
+    generate_histogram(graph, station_index, outputs)
 
-# Start the program.
+# Start the program; file names on the command line receive the histogram.
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
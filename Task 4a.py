@@ -1,6 +1,5 @@
 from adjacency_list_graph import AdjacencyListGraph
-from mst import kruskal
-from bfs import bfs
+from closure_planner import plan_closures
 
 
 # To read CSV file for creating a graph
@@ -37,21 +36,13 @@ def create_and_process_graph(london_underground_data):
 
 # To find the minimum spanning tree using Kruskal's algorithm from the library and identify the edges to shut
 def determine_and_display_shutdowns(data_graph, station_to_indices):
-    mst = kruskal(data_graph)
-    edges_to_shut = [edge for edge in data_graph.get_edge_list() if edge not in mst.get_edge_list()]
+    # The plan also checks that the network left after the closures is still connected
+    plan = plan_closures(data_graph)
     index_to_station = {index: station for station, index in station_to_indices.items()}
-    edges_to_remove_names = [(index_to_station[u], index_to_station[v]) for u, v in edges_to_shut]
-
-    # To verify that the connection still remains feasible
-    is_connected = True
-    for starting_node in range(len(station_to_indices)):
-        distances, _ = bfs(data_graph, starting_node)
-        if float('inf') in distances:
-            is_connected = False
-            break
+    edges_to_remove_names = plan.named_closures(index_to_station)
 
     # To print the result
-    if is_connected:
+    if plan.is_connected():
         print("Recommended Tube Line Shutdowns for Operational Efficiency:")
         print(f"{'No.':<10} {'Shutdown Segment':<60}")
         print("-" * 70)
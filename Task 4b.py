@@ -1,6 +1,8 @@
+import sys
 from adjacency_list_graph import AdjacencyListGraph
 from dijkstra import dijkstra
-import matplotlib.pyplot as plt
+from journey_report import export_histograms
+from journey_statistics import journey_time_histogram
 import numpy as np
 
 
@@ -43,17 +45,15 @@ def create_graph_from_graph(graph_data):
 graph, station_to_index = create_graph_from_graph(csv_data)
 
 
-# Function to calculate all-pairs shortest route using Dijkstra's algorithm
+# Function to calculate all-pairs shortest route using Dijkstra's algorithm,
+# aggregating each row of journey times as it is produced
 def calculate_all_pairs_shortest_paths(data_graph, station_to_indices):
-    shortest_paths = {}
-    for station, index in station_to_indices.items():
-        distances, _ = dijkstra(data_graph, index)
-        shortest_paths[station] = {s: distances[station_to_indices[s]] for s in station_to_indices}
-    return shortest_paths
+    rows = ((index, dijkstra(data_graph, index)[0]) for index in station_to_indices.values())
+    return journey_time_histogram(rows)
 
 
 # Calculate shortest route for all pairs (pre-closure)
-pre_closure_shortest_paths = calculate_all_pairs_shortest_paths(graph, station_to_index)
+pre_closure_times = calculate_all_pairs_shortest_paths(graph, station_to_index)
 
 # To add the edges to remove based on my closure list from task 4a
 edges_to_remove = [
@@ -87,54 +87,49 @@ for edge in edges_to_remove:
     graph.delete_edge(station_to_index[u], station_to_index[v], delete_undirected=True)
 
 # To calculate shortest paths for all pairs (post-closure)
-post_closure_shortest_paths = calculate_all_pairs_shortest_paths(graph, station_to_index)
-
-
-# A function to prepare data for creating a histogram
-def prepare_histogram_data(shortest_paths):
-    journey_times = []
-    for source in shortest_paths:
-        for target in shortest_paths[source]:
-            if shortest_paths[source][target] != float('inf'):
-                journey_times.append(shortest_paths[source][target])
-    return journey_times
-
-
-# A function to prepare data for creating a histogram
-def preparing_histogram_data(shortest_paths):
-    return [time for paths in shortest_paths.values() for time in paths.values() if time != float('inf')]
-
-
-pre_closure_times = prepare_histogram_data(pre_closure_shortest_paths)
-post_closure_times = prepare_histogram_data(post_closure_shortest_paths)
+post_closure_times = calculate_all_pairs_shortest_paths(graph, station_to_index)
 
 # To determine the common range for both datasets
-time_min = min(min(pre_closure_times), min(post_closure_times))
-time_max = max(max(pre_closure_times), max(post_closure_times))
+time_min = min(pre_closure_times.get_min(), post_closure_times.get_min())
+time_max = max(pre_closure_times.get_max(), post_closure_times.get_max())
 
 # To define the number of bins for the histogram, and explicitly set the bin edges
 bin_edges = np.linspace(time_min, time_max, num=30)  # 30 bins
 
-# To determine the figure size
-plt.figure(figsize=(16, 8))
-
-
-# Creating a histogram for Pre-Closure Times
-plt.subplot(1, 2, 1)
-plt.hist(pre_closure_times, bins=bin_edges, alpha=0.75, label='Pre-Closure', color='#2B8BBA', edgecolor='black', density=True)
-plt.title('Distribution of Journey Times Before Closure', fontsize=15)
-plt.xlabel('Journey Time (minutes)', fontsize=12)
-plt.ylabel('Density of Station Pairs', fontsize=12)
-plt.legend(fontsize=12)
-plt.grid(True, linestyle='--', alpha=0.5)
-
-# Creating a histogram for Post-Closure Times
-plt.subplot(1, 2, 2)
-plt.hist(post_closure_times, bins=bin_edges, alpha=0.75, label='Post-Closure', color='#BA2B2B', edgecolor='black', density=True)
-plt.title('Distribution of Journey Times After Closure', fontsize=15)
-plt.xlabel('Journey Time (minutes)', fontsize=12)
-plt.ylabel('Density of Station Pairs', fontsize=12)
-plt.legend(fontsize=12)
-plt.grid(True, linestyle='--', alpha=0.5)
-# To display the histograms
-plt.show()
+# To count the journey times in each bin
+pre_closure_counts = pre_closure_times.histogram(bin_edges)
+post_closure_counts = post_closure_times.histogram(bin_edges)
+
+# Any file names given on the command line (CSV, JSON, PNG or SVG) receive the histograms,
+# rendered off-screen, instead of a window
+outputs = sys.argv[1:]
+if outputs:
+    export_histograms(outputs, bin_edges, {'Pre-Closure': pre_closure_counts, 'Post-Closure': post_closure_counts},
+                      titles=['Distribution of Journey Times Before Closure', 'Distribution of Journey Times After Closure'],
+                      xlabel='Journey Time (minutes)', ylabel='Density of Station Pairs', density=True,
+                      colors=['#2B8BBA', '#BA2B2B'], figsize=(16, 8))
+else:
+    import matplotlib.pyplot as plt
+
+    # To determine the figure size
+    plt.figure(figsize=(16, 8))
+
+    # Creating a histogram for Pre-Closure Times
+    plt.subplot(1, 2, 1)
+    plt.hist(bin_edges[:-1], bins=bin_edges, weights=pre_closure_counts, alpha=0.75, label='Pre-Closure', color='#2B8BBA', edgecolor='black', density=True)
+    plt.title('Distribution of Journey Times Before Closure', fontsize=15)
+    plt.xlabel('Journey Time (minutes)', fontsize=12)
+    plt.ylabel('Density of Station Pairs', fontsize=12)
+    plt.legend(fontsize=12)
+    plt.grid(True, linestyle='--', alpha=0.5)
+
+    # Creating a histogram for Post-Closure Times
+    plt.subplot(1, 2, 2)
+    plt.hist(bin_edges[:-1], bins=bin_edges, weights=post_closure_counts, alpha=0.75, label='Post-Closure', color='#BA2B2B', edgecolor='black', density=True)
+    plt.title('Distribution of Journey Times After Closure', fontsize=15)
+    plt.xlabel('Journey Time (minutes)', fontsize=12)
+    plt.ylabel('Density of Station Pairs', fontsize=12)
+    plt.legend(fontsize=12)
+    plt.grid(True, linestyle='--', alpha=0.5)
+    # To display the histograms
+    plt.show()
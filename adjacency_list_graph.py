@@ -91,6 +91,7 @@ class AdjacencyListGraph:
 			self.adj_lists[i] = DLLSentinel(get_key_func=Edge.get_v)  # will be a list of Edge objects
 		self.card_V = card_V
 		self.card_E = 0
+		self.version = 0  # incremented on every mutation, so that derived data can detect staleness
 
 	def get_card_V(self):
 		"""Return the number of vertices in this graph."""
@@ -100,6 +101,10 @@ class AdjacencyListGraph:
 		"""Return the number of edges in this graph."""
 		return self.card_E
 
+	def get_version(self):
+		"""Return the mutation counter of this graph."""
+		return self.version
+
 	def get_adj_lists(self):
 		"""Return the adjacency lists of all the vertices in this graph."""
 		return self.adj_lists
@@ -140,6 +145,7 @@ class AdjacencyListGraph:
 			raise RuntimeError("An edge (" + str(u) + ", " + str(v) + ") already exists.")
 		self.adj_lists[u].append(Edge(v, weight))
 		self.card_E += 1
+		self.version += 1
 
 		# If this graph is undirected, insert an edge from v to u.
 		if not self.directed:
@@ -167,18 +173,33 @@ class AdjacencyListGraph:
 		if edge is not None:
 			self.adj_lists[u].delete(edge)
 			self.card_E -= 1
+			self.version += 1
 
 		if not self.directed and delete_undirected:
 			edge = self.adj_lists[v].search(u)
 			if edge is not None:
 				self.adj_lists[v].delete(edge)
+				self.version += 1
+
+	def set_weight(self, u, v, weight):
+		"""Set the weight of edge (u, v), and of (v, u) if the graph is undirected.
+			Error if the edge does not exist."""
+		edge = self.find_edge(u, v)
+		if edge is None:
+			raise RuntimeError("No edge (" + str(u) + ", " + str(v) + ") to reweight.")
+		edge.set_weight(weight)
+		if not self.directed:
+			self.find_edge(v, u).set_weight(weight)
+		self.version += 1
 
 	def copy(self):
 		"""Return a copy of this graph."""
 		copy = AdjacencyListGraph(self.card_V, self.directed, self.weighted)
 		copy.card_E = self.card_E
 		for u in range(self.card_V):
-			copy.adj_lists[u] = self.adj_lists[u].copy()
+			# Copy the Edge objects too, so that set_weight on the copy leaves this graph alone.
+			for edge in self.get_adj_list(u):
+				copy.adj_lists[u].append(Edge(edge.get_v(), edge.get_weight() if self.weighted else None))
 		return copy
 
 	def get_edge_list(self):
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# all_pairs_shortest_paths.py
+
+import numpy as np
+from dijkstra import dijkstra_csr
+
+
+def iter_distance_rows(C, sources=None, edge_mask=None):
+	"""Yield one row of shortest-path distances at a time, so that callers can consume
+	all-pairs distances without storing the whole matrix.
+
+	Arguments:
+	C -- a CSRGraph with nonnegative weights
+	sources -- optional iterable of source vertices; all vertices by default
+	edge_mask -- optional mask indexed by edge id; edges with a nonzero entry are skipped
+	Yields:
+	(s, d) pairs, where d is the list of distances from s, inf if unreachable
+	"""
+	if sources is None:
+		sources = range(C.get_card_V())
+	for s in sources:
+		yield s, dijkstra_csr(C, s, edge_mask=edge_mask)[0]
+
+
+def all_pairs_distances(C, sources=None, edge_mask=None):
+	"""Return a NumPy array of shortest-path distances with one row per source,
+	in the order of sources (all vertices by default), and inf for unreachable pairs."""
+	if sources is None:
+		sources = range(C.get_card_V())
+	sources = list(sources)
+	D = np.empty((len(sources), C.get_card_V()))
+	for k, (_, d) in enumerate(iter_distance_rows(C, sources, edge_mask)):
+		D[k] = d
+	return D
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from csr_graph import CSRGraph
+	from dijkstra import dijkstra
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	graph1 = generate_random_graph(50, 0.1, True, True, True, 0, 15)
+	D = all_pairs_distances(CSRGraph(graph1))
+	print(all(D[s].tolist() == dijkstra(graph1, s)[0] for s in range(50)))
+
+	graph2, _ = load_london_underground()
+	start = time.perf_counter()
+	D = all_pairs_distances(CSRGraph(graph2))
+	print(D.shape, f"in {time.perf_counter() - start:.3f} s")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# batch_queries.py
+
+from itertools import islice
+from dijkstra import dijkstra_csr
+
+
+def trace_path(pi, s, v):
+	"""Return the list of vertices on the path from s to v given by predecessors pi,
+	or None if there is no such path.  Iterative, unlike print_path."""
+	path = [v]
+	while v != s:
+		v = pi[v]
+		if v is None:
+			return None
+		path.append(v)
+	path.reverse()
+	return path
+
+
+def batch_shortest_paths(C, pairs, with_paths=False, cache=None):
+	"""Answer many shortest-path queries, running one search per distinct origin.
+
+	Queries are grouped by origin, and the search from each origin stops as soon
+	as all of that origin's destinations are settled.  With a cache, whole trees
+	are taken from it instead, so that origins repeated across calls are searched once.
+
+	Arguments:
+	C -- a CSRGraph with nonnegative weights
+	pairs -- list of (s, t) vertex index pairs
+	with_paths -- whether to return the paths as well as the distances
+	cache -- optional ShortestPathTreeCache whose trees are searched in C
+	Returns:
+	distances -- list of distances in the order of pairs; inf if t is unreachable
+	paths -- list of vertex lists (None if unreachable) in the order of pairs,
+	or None if with_paths is False
+	"""
+	by_origin = {}
+	for i, (s, t) in enumerate(pairs):
+		by_origin.setdefault(s, []).append(i)
+
+	distances = [None] * len(pairs)
+	paths = [None] * len(pairs) if with_paths else None
+	for s, queries in by_origin.items():
+		if cache is not None:
+			d, pi = cache.get(s)
+		else:
+			d, pi = dijkstra_csr(C, s, targets=[pairs[i][1] for i in queries])
+		for i in queries:
+			t = pairs[i][1]
+			distances[i] = d[t]
+			if with_paths and d[t] != float('inf'):
+				paths[i] = trace_path(pi, s, t)
+	return distances, paths
+
+
+def stream_station_queries(C, stations, pairs, with_paths=False, chunk_size=10000, cache=None):
+	"""Answer a stream of station-name queries in chunks, yielding results in input order.
+
+	At most chunk_size queries are held in memory at a time, and each chunk runs one
+	search per distinct origin.  Queries naming an unknown station give distance None.
+
+	Arguments:
+	C -- a CSRGraph of the network
+	stations -- dictionary mapping station names to vertex indices
+	pairs -- iterable of (start, end) station names
+	with_paths -- whether to include the paths, as lists of station names
+	chunk_size -- number of queries answered together
+	cache -- optional ShortestPathTreeCache, as for batch_shortest_paths
+	Yields:
+	(start, end, distance, path) tuples; path is None if not requested or no path exists
+	"""
+	names = list(stations)
+	pairs = iter(pairs)
+	while True:
+		chunk = list(islice(pairs, chunk_size))
+		if not chunk:
+			return
+		known = [i for i, (start, end) in enumerate(chunk) if start in stations and end in stations]
+		distances, paths = batch_shortest_paths(
+			C, [(stations[chunk[i][0]], stations[chunk[i][1]]) for i in known], with_paths, cache)
+		answers = [(None, None)] * len(chunk)
+		for j, i in enumerate(known):
+			path = paths[j] if with_paths else None
+			answers[i] = (distances[j], None if path is None else [names[v] for v in path])
+		for (start, end), (distance, path) in zip(chunk, answers):
+			yield start, end, distance, path
+
+
+def batch_station_queries(C, stations, pairs, with_paths=False):
+	"""Answer a list of (start, end) station-name queries.
+
+	Returns:
+	distances -- list of distances in input order (None for unknown stations)
+	paths -- list of station-name paths in input order, or None if with_paths is False
+	"""
+	results = list(stream_station_queries(C, stations, pairs, with_paths, chunk_size=max(1, len(pairs))))
+	distances = [distance for _, _, distance, _ in results]
+	return distances, [path for _, _, _, path in results] if with_paths else None
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from random import Random
+	from csr_graph import CSRGraph
+	from dijkstra import dijkstra
+	from london_underground import load_london_underground
+
+	graph1, stations1 = load_london_underground()
+	csr1 = CSRGraph(graph1)
+	names = list(stations1)
+	rng = Random(1)
+	pairs = [(rng.choice(names), rng.choice(names)) for _ in range(20000)]
+
+	start = time.perf_counter()
+	distances, paths = batch_station_queries(csr1, stations1, pairs, with_paths=True)
+	batch_time = time.perf_counter() - start
+
+	# Check a sample against one dijkstra call per pair, and time those calls.
+	sample = pairs[:200]
+	start = time.perf_counter()
+	expected = [dijkstra(graph1, stations1[a])[0][stations1[b]] for a, b in sample]
+	per_pair_time = (time.perf_counter() - start) * len(pairs) / len(sample)
+	print(distances[:len(sample)] == expected)
+	print(all(path[0] == a and path[-1] == b for (a, b), path in zip(pairs, paths) if path is not None))
+	print(f"{len(pairs)} queries: batch {batch_time:.3f} s, estimated per-pair dijkstra {per_pair_time:.1f} s")
+
+	# Unknown stations give None.
+	print(batch_station_queries(csr1, stations1, [("Bank", "Nowhere"), ("Bank", "Bank")]))
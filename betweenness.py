@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# betweenness.py
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from random import Random
+import numpy as np
+from csr_graph import CSRGraph
+
+
+def _shortest_path_dag(C, s, weighted):
+	"""Search from s, counting shortest paths.
+
+	Returns:
+	order -- reachable vertices in nondecreasing order of distance from s
+	sigma -- number of shortest paths from s to each vertex
+	preds -- for each vertex, list of (predecessor, edge id) pairs on shortest paths
+	"""
+	offsets, heads, weights, edge_ids = C.offsets, C.heads, C.weights, C.edge_ids
+	card_V = C.get_card_V()
+	d = [float('inf')] * card_V
+	sigma = [0] * card_V
+	preds = [[] for _ in range(card_V)]
+	order = []
+	d[s] = 0
+	sigma[s] = 1
+
+	if weighted:  # Dijkstra's algorithm with lazy deletion
+		settled = bytearray(card_V)
+		queue = [(0, s)]
+		while queue:
+			du, u = heappop(queue)
+			if settled[u]:  # stale entry
+				continue
+			settled[u] = 1
+			order.append(u)
+			for i in range(offsets[u], offsets[u + 1]):
+				v = heads[i]
+				dv = du + weights[i]
+				if dv < d[v]:
+					d[v] = dv
+					sigma[v] = sigma[u]
+					preds[v] = [(u, edge_ids[i])]
+					heappush(queue, (dv, v))
+				elif dv == d[v] and not settled[v]:
+					sigma[v] += sigma[u]
+					preds[v].append((u, edge_ids[i]))
+	else:  # breadth-first search
+		queue = deque([s])
+		while queue:
+			u = queue.popleft()
+			order.append(u)
+			du = d[u] + 1
+			for i in range(offsets[u], offsets[u + 1]):
+				v = heads[i]
+				if d[v] == float('inf'):
+					d[v] = du
+					queue.append(v)
+				if d[v] == du:
+					sigma[v] += sigma[u]
+					preds[v].append((u, edge_ids[i]))
+
+	return order, sigma, preds
+
+
+def _accumulate(C, sources, weighted):
+	"""Return the node and edge dependencies summed over the given sources, as lists."""
+	card_V = C.get_card_V()
+	node = [0.0] * card_V
+	edge = [0.0] * C.get_card_E()
+	for s in sources:
+		order, sigma, preds = _shortest_path_dag(C, s, weighted)
+		delta = [0.0] * card_V
+		for w in reversed(order):
+			coefficient = (1 + delta[w]) / sigma[w]
+			for v, eid in preds[w]:
+				c = sigma[v] * coefficient
+				delta[v] += c
+				edge[eid] += c
+			if w != s:
+				node[w] += delta[w]
+	return node, edge
+
+
+# The network is read-only, and is handed to each worker process once when it starts.
+_worker_graph = None
+
+
+def _init_worker(C):
+	global _worker_graph
+	_worker_graph = C
+
+
+def _accumulate_in_worker(sources, weighted):
+	return _accumulate(_worker_graph, sources, weighted)
+
+
+def betweenness(G, weighted=None, samples=None, seed=None, normalized=False, processes=1):
+	"""Compute the betweenness centrality of every vertex and every edge with Brandes'
+	algorithm: one shortest-path search per source that also counts shortest paths,
+	followed by accumulating dependencies in reverse order of distance.
+
+	With samples, only that many sources, chosen at random, are searched, and the
+	results are scaled up by card_V / samples to estimate the exact values.
+
+	Arguments:
+	G -- a graph implemented with adjacency lists, or a CSRGraph snapshot of one
+	weighted -- whether to use edge weights, which must be positive, with Dijkstra's
+	algorithm, or to count edges with breadth-first search; by default, whether G is weighted
+	samples -- optional number of sources to sample
+	seed -- optional seed for sampling
+	normalized -- whether to divide by the number of pairs of other vertices (for
+	vertices) or of all vertices (for edges)
+	processes -- number of worker processes; None means the number of CPUs
+	Returns:
+	node -- NumPy array of the betweenness of each vertex
+	edge -- NumPy array of the betweenness of each edge, indexed by edge id as given by CSRGraph
+	"""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	if weighted is None:
+		weighted = C.is_weighted()
+	card_V = C.get_card_V()
+	sources = list(range(card_V))
+	if samples is not None and samples < card_V:
+		sources = Random(seed).sample(sources, samples)
+	if processes is None:
+		processes = os.cpu_count() or 1
+
+	if processes <= 1 or len(sources) <= 1:
+		node, edge = _accumulate(C, sources, weighted)
+		node, edge = np.array(node), np.array(edge)
+	else:
+		chunks = [sources[k::4 * processes] for k in range(min(len(sources), 4 * processes))]
+		node, edge = np.zeros(card_V), np.zeros(C.get_card_E())
+		with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(C,)) as executor:
+			for partial_node, partial_edge in executor.map(_accumulate_in_worker, chunks, [weighted] * len(chunks)):
+				node += partial_node
+				edge += partial_edge
+
+	if len(sources) < card_V:
+		node *= card_V / len(sources)
+		edge *= card_V / len(sources)
+	if not C.is_directed():  # each unordered pair was counted from both ends
+		node /= 2
+		edge /= 2
+	if normalized:
+		pairs = 1 if C.is_directed() else 2
+		if card_V > 2:
+			node *= pairs / ((card_V - 1) * (card_V - 2))
+		if card_V > 1:
+			edge *= pairs / (card_V * (card_V - 1))
+	return node, edge
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from all_pairs_shortest_paths import all_pairs_distances
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	def brute_force_betweenness(G, weighted):
+		"""Betweenness from all-pairs distances and path counts, by definition."""
+		C = CSRGraph(G, unit_weights=not weighted)
+		card_V = C.get_card_V()
+		D = all_pairs_distances(C)
+		# Count shortest paths between all pairs by processing each row in order of distance.
+		S = np.zeros((card_V, card_V))
+		for s in range(card_V):
+			S[s, s] = 1
+			for v in sorted(range(card_V), key=lambda x: D[s, x]):
+				for i in range(C.offsets[v], C.offsets[v + 1]):
+					z = C.heads[i]
+					if z != s and D[s, v] + C.weights[i] == D[s, z]:
+						S[s, z] += S[s, v]
+		node, edge = np.zeros(card_V), np.zeros(C.get_card_E())
+		for s in range(card_V):
+			for t in range(card_V):
+				if s == t or not np.isfinite(D[s, t]):
+					continue
+				for v in range(card_V):
+					if v != s and v != t and D[s, v] + D[v, t] == D[s, t]:
+						node[v] += S[s, v] * S[v, t] / S[s, t]
+				for u in range(card_V):
+					for i in range(C.offsets[u], C.offsets[u + 1]):
+						v = C.heads[i]
+						if D[s, u] + C.weights[i] + D[v, t] == D[s, t]:
+							edge[C.edge_ids[i]] += S[s, u] * S[v, t] / S[s, t]
+		if not C.is_directed():
+			node /= 2
+			edge /= 2
+		return node, edge
+
+	# Compare with the definition, with small integer weights so that ties are common.
+	all_equal = True
+	for directed in (True, False):
+		for weighted in (True, False):
+			graph1 = generate_random_graph(15, 0.25, True, directed, True, 1, 3)
+			node, edge = betweenness(graph1, weighted)
+			expected_node, expected_edge = brute_force_betweenness(graph1, weighted)
+			if not (np.allclose(node, expected_node) and np.allclose(edge, expected_edge)):
+				print("Mismatch with directed =", directed, "and weighted =", weighted)
+				all_equal = False
+	print("All betweenness values are " + ("not " if not all_equal else "") + "equal")
+
+	# The tube network, exactly, in parallel, and from a sample of sources.
+	graph2, stations2 = load_london_underground()
+	names = list(stations2)
+	csr2 = CSRGraph(graph2)
+	start = time.perf_counter()
+	node, edge = betweenness(csr2)
+	print(f"Exact betweenness in {time.perf_counter() - start:.2f} s")
+	for v in np.argsort(-node)[:5]:
+		print("   ", names[v], round(node[v]))
+	for eid in np.argsort(-edge)[:3]:
+		u, v = csr2.edge_endpoints(eid)
+		print("   ", names[u], "->", names[v], round(edge[eid]))
+	start = time.perf_counter()
+	parallel_node, parallel_edge = betweenness(csr2, processes=2)
+	print(f"With 2 processes in {time.perf_counter() - start:.2f} s:",
+		  np.allclose(node, parallel_node) and np.allclose(edge, parallel_edge))
+	start = time.perf_counter()
+	sampled_node, _ = betweenness(csr2, samples=70, seed=1)
+	top = set(np.argsort(-node)[:20])
+	print(f"Sampled from 70 sources in {time.perf_counter() - start:.2f} s:",
+		  len(top & set(np.argsort(-sampled_node)[:20])), "of the top 20 stations found")
+	hop_node, _ = betweenness(csr2, weighted=False)
+	print("By stops:", [names[v] for v in np.argsort(-hop_node)[:5]])
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# bridges.py
+
+from csr_graph import CSRGraph
+from disjoint_set_forest import DisjointSetArray
+
+
+def bridges_and_articulation_points(G):
+	"""Find the bridges and articulation points of an undirected graph with an
+	iterative version of Tarjan's lowpoint depth-first search, in O(V + E) time.
+
+	A bridge is an edge whose removal disconnects its endpoints, and an articulation
+	point is a vertex whose removal disconnects the graph.  The search skips the tree
+	edge to a vertex's parent by edge id, not by vertex.
+
+	Arguments:
+	G -- an undirected graph, implemented with adjacency lists, or a CSRGraph snapshot
+	Returns:
+	bridges -- list of the edge ids of the bridges, as given by CSRGraph
+	articulation_points -- sorted list of the articulation points
+	"""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	if C.is_directed():
+		raise RuntimeError("Graph should be undirected.")
+	card_V = C.get_card_V()
+	offsets, heads, edge_ids = C.offsets, C.heads, C.edge_ids
+
+	disc = [-1] * card_V  # discovery times
+	low = [0] * card_V    # earliest discovery time reachable through one back edge
+	parent_edge = [-1] * card_V
+	is_articulation = bytearray(card_V)
+	bridges = []
+	time = 0
+
+	for root in range(card_V):
+		if disc[root] != -1:
+			continue
+		disc[root] = low[root] = time
+		time += 1
+		root_children = 0
+		vertex_stack = [root]
+		slot_stack = [offsets[root]]  # next adjacency slot to examine for each vertex on the stack
+		while vertex_stack:
+			u = vertex_stack[-1]
+			i = slot_stack[-1]
+			if i < offsets[u + 1]:
+				slot_stack[-1] = i + 1
+				if edge_ids[i] == parent_edge[u]:
+					continue
+				v = heads[i]
+				if disc[v] == -1:  # tree edge: descend to v
+					parent_edge[v] = edge_ids[i]
+					disc[v] = low[v] = time
+					time += 1
+					vertex_stack.append(v)
+					slot_stack.append(offsets[v])
+					if u == root:
+						root_children += 1
+				elif disc[v] < low[u]:  # back edge
+					low[u] = disc[v]
+			else:  # u is finished: pass its lowpoint up to its parent
+				vertex_stack.pop()
+				slot_stack.pop()
+				if vertex_stack:
+					p = vertex_stack[-1]
+					if low[u] < low[p]:
+						low[p] = low[u]
+					if low[u] > disc[p]:
+						bridges.append(parent_edge[u])
+					if p != root and low[u] >= disc[p]:
+						is_articulation[p] = 1
+		if root_children > 1:
+			is_articulation[root] = 1
+
+	return bridges, [v for v in range(card_V) if is_articulation[v]]
+
+
+def find_bridges(G):
+	"""Return the bridges of an undirected graph as a list of (u, v) pairs."""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	return [C.edge_endpoints(eid) for eid in bridges_and_articulation_points(C)[0]]
+
+
+def articulation_points(G):
+	"""Return a sorted list of the articulation points of an undirected graph."""
+	return bridges_and_articulation_points(G)[1]
+
+
+def two_edge_connected_components(G):
+	"""Label the 2-edge-connected components of an undirected graph: the components
+	that remain after removing every bridge.
+
+	Returns:
+	labels -- list giving the component number, from 0, of every vertex
+	count -- number of components
+	"""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	is_bridge = bytearray(C.get_card_E())
+	for eid in bridges_and_articulation_points(C)[0]:
+		is_bridge[eid] = 1
+	forest = DisjointSetArray(C.get_card_V())
+	kept = [eid for eid in range(C.get_card_E()) if not is_bridge[eid]]
+	forest.union_many([C.tails[eid] for eid in kept], [C.ends[eid] for eid in kept])
+	numbers = {}
+	labels = [numbers.setdefault(root, len(numbers)) for root in forest.labels()]
+	return labels, len(numbers)
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	def component_count(G, skip_vertex=None):
+		"""Count connected components by BFS, optionally ignoring a vertex."""
+		card_V = G.get_card_V()
+		seen = [False] * card_V
+		count = 0
+		for s in range(card_V):
+			if s == skip_vertex or seen[s]:
+				continue
+			count += 1
+			stack = [s]
+			seen[s] = True
+			while stack:
+				u = stack.pop()
+				for edge in G.get_adj_list(u):
+					v = edge.get_v()
+					if v != skip_vertex and not seen[v]:
+						seen[v] = True
+						stack.append(v)
+		return count
+
+	# Compare with removing each edge and each vertex and counting components.
+	all_equal = True
+	for trial in range(20):
+		graph1 = generate_random_graph(25, 0.09, True, False, False)
+		bridges, points = bridges_and_articulation_points(graph1)
+		csr1 = CSRGraph(graph1)
+		base = component_count(graph1)
+		expected_bridges = []
+		for eid in range(csr1.get_card_E()):
+			u, v = csr1.edge_endpoints(eid)
+			graph1.delete_edge(u, v)
+			if component_count(graph1) > base:
+				expected_bridges.append(eid)
+			graph1.insert_edge(u, v)
+		# Removing an isolated vertex removes its own component.
+		isolated = [not any(True for _ in graph1.get_adj_list(x)) for x in range(25)]
+		expected_points = [x for x in range(25) if component_count(graph1, x) > base - isolated[x]]
+		if sorted(bridges) != expected_bridges or points != expected_points:
+			print("Mismatch in trial", trial)
+			all_equal = False
+	print("All bridges and articulation points are " + ("not " if not all_equal else "") + "equal")
+
+	# The tube network.
+	graph2, stations2 = load_london_underground(directed=False)
+	start = time.perf_counter()
+	bridges, points = bridges_and_articulation_points(graph2)
+	labels, count = two_edge_connected_components(graph2)
+	elapsed = time.perf_counter() - start
+	print(len(bridges), "bridges,", len(points), "articulation points,", count, "2-edge-connected components")
+	print(f"in {elapsed * 1e3:.2f} ms")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# closeness.py
+
+from random import Random
+import numpy as np
+from all_pairs_shortest_paths import iter_distance_rows
+from csr_graph import csr_snapshot
+
+
+def _centralities(card_V, reached, total, inverse_total):
+	"""Turn per-vertex counts of other vertices reached, sums of distances to them, and
+	sums of inverse distances into closeness and harmonic centrality arrays."""
+	closeness = np.zeros(card_V)
+	positive = total > 0
+	if card_V > 1:
+		# Wasserman and Faust: scale the closeness within the reachable set by the fraction reached.
+		closeness[positive] = (reached[positive] / (card_V - 1)) * (reached[positive] / total[positive])
+		harmonic = inverse_total / (card_V - 1)
+	else:
+		harmonic = np.zeros(card_V)
+	return closeness, harmonic
+
+
+def closeness_from_rows(rows, card_V):
+	"""Compute closeness and harmonic centrality from rows of distances as they are
+	produced, keeping only three numbers per vertex rather than the distance matrix.
+
+	A vertex's centrality is computed from the distances out of it.  Unreachable
+	pairs are skipped: closeness follows Wasserman and Faust, multiplying the inverse
+	mean distance to the vertices reached by the fraction of other vertices reached,
+	and harmonic centrality sums inverse distances, in which unreachable pairs count
+	as zero.  Both are 0 for a vertex that reaches nothing.
+
+	Arguments:
+	rows -- iterable of (s, d) pairs, such as iter_distance_rows yields, where d is the
+	list of distances from s; vertices without a row get 0
+	card_V -- number of vertices
+	Returns:
+	closeness -- NumPy array of the closeness of each vertex, between 0 and 1 for unit distances
+	harmonic -- NumPy array of the harmonic centrality of each vertex, divided by card_V - 1
+	"""
+	reached = np.zeros(card_V)
+	total = np.zeros(card_V)
+	inverse_total = np.zeros(card_V)
+	for s, d in rows:
+		d = np.asarray(d, dtype=float)
+		keep = np.isfinite(d) & (d > 0)
+		keep[s] = False
+		reached[s] = np.isfinite(d).sum() - 1
+		total[s] = d[keep].sum()
+		inverse_total[s] = (1 / d[keep]).sum()
+	return _centralities(card_V, reached, total, inverse_total)
+
+
+def closeness_centrality(G, samples=None, seed=None, unit_weights=False, edge_mask=None):
+	"""Compute the closeness and harmonic centrality of every vertex, exactly from one
+	search per vertex, or approximately from searches from a sample of vertices.
+
+	The sampled estimate, after Eppstein and Wang, searches backward from each sampled
+	vertex, which gives the distances from every vertex to the samples, and scales the
+	sums over the samples up to all card_V - 1 other vertices.
+
+	Arguments:
+	G -- a graph implemented with adjacency lists, or a CSRGraph snapshot of one, with
+	nonnegative weights
+	samples -- optional number of vertices to sample
+	seed -- optional seed for sampling
+	unit_weights -- whether to count edges instead of using weights
+	edge_mask -- optional mask indexed by edge id of edges to skip
+	Returns:
+	closeness, harmonic -- NumPy arrays as closeness_from_rows gives them, indexed by
+	vertex, and so aligned with the list of stations of load_london_underground
+	"""
+	C = csr_snapshot(G, unit_weights)
+	card_V = C.get_card_V()
+	if samples is None or samples >= card_V:
+		return closeness_from_rows(iter_distance_rows(C, edge_mask=edge_mask), card_V)
+
+	R = C.transpose() if C.is_directed() else C
+	reached = np.zeros(card_V)
+	total = np.zeros(card_V)
+	inverse_total = np.zeros(card_V)
+	sampled = np.zeros(card_V)  # for each vertex, the number of samples other than itself
+	for s, d in iter_distance_rows(R, Random(seed).sample(range(card_V), samples), edge_mask):
+		d = np.asarray(d, dtype=float)  # d[v] is the distance from v to s
+		finite = np.isfinite(d)
+		finite[s] = False
+		sampled += 1
+		sampled[s] -= 1
+		reached[finite] += 1
+		total[finite] += d[finite]
+		inverse_total[finite & (d > 0)] += 1 / d[finite & (d > 0)]
+	scale = np.divide(card_V - 1, sampled, out=np.zeros(card_V), where=sampled > 0)
+	return _centralities(card_V, reached * scale, total * scale, inverse_total * scale)
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from all_pairs_shortest_paths import all_pairs_distances
+	from csr_graph import CSRGraph
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	# Compare with the definitions on graphs that are not strongly connected.
+	all_equal = True
+	for directed in (True, False):
+		graph1 = generate_random_graph(30, 0.06, True, directed, True, 1, 10)
+		D = all_pairs_distances(CSRGraph(graph1))
+		closeness, harmonic = closeness_centrality(graph1)
+		for s in range(30):
+			others = [D[s, t] for t in range(30) if t != s and np.isfinite(D[s, t])]
+			expected_closeness = (len(others) / 29) * (len(others) / sum(others)) if others else 0
+			expected_harmonic = sum(1 / x for x in others) / 29
+			if not (np.isclose(closeness[s], expected_closeness) and np.isclose(harmonic[s], expected_harmonic)):
+				all_equal = False
+	print("All closeness and harmonic centralities are " + ("not " if not all_equal else "") + "equal")
+
+	# The tube network, exactly and from samples.
+	graph2, stations2 = load_london_underground()
+	names = list(stations2)
+	start = time.perf_counter()
+	closeness, harmonic = closeness_centrality(graph2)
+	print(f"Exact in {time.perf_counter() - start:.3f} s; most central:",
+		  [names[v] for v in np.argsort(-closeness)[:5]])
+	by_stops = closeness_centrality(graph2, unit_weights=True)[0]
+	print("By stops:", [names[v] for v in np.argsort(-by_stops)[:5]],
+		  np.array_equal(by_stops, closeness_centrality(CSRGraph(graph2), unit_weights=True)[0]))
+	for samples in (20, 70):
+		start = time.perf_counter()
+		estimate, harmonic_estimate = closeness_centrality(graph2, samples, seed=1)
+		error = np.abs(estimate - closeness) / closeness
+		print(f"{samples} samples in {time.perf_counter() - start:.3f} s: mean relative error {error.mean():.3f}, "
+			  f"harmonic correlation {np.corrcoef(harmonic, harmonic_estimate)[0, 1]:.3f}")
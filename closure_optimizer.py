@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# closure_optimizer.py
+
+from heapq import heappush, heappop, heapify
+import numpy as np
+from closure_scenarios import scenario_statistics
+from dijkstra import dijkstra_csr
+
+
+class ShortestPathForest:
+
+	def __init__(self, C, edge_mask=None):
+		"""Keep the shortest-path tree from every source of a network, along with an index
+		from each edge to the (source, vertex) pairs whose tree edge it is.
+
+		Arguments:
+		C -- a CSRGraph with nonnegative weights
+		edge_mask -- optional mask indexed by edge id of edges already closed
+		"""
+		self.C = C
+		self.R = C.transpose() if C.is_directed() else C  # in-edges, for repairing subtrees
+		self.edge_mask = C.new_edge_mask() if edge_mask is None else bytearray(edge_mask)
+		card_V = C.get_card_V()
+		self.D = np.empty((card_V, card_V))
+		self.d = [None] * card_V
+		self.children = [None] * card_V
+		self.tree_edge = [None] * card_V  # tree_edge[s][v] is the id of the edge into v in the tree from s
+		self.uses = [set() for _ in range(C.get_card_E())]
+		for s in range(card_V):
+			self.search(s)
+
+	def search(self, s):
+		"""Recompute the tree from s under the current edge mask and update the index."""
+		C = self.C
+		if self.tree_edge[s] is not None:
+			for v, eid in enumerate(self.tree_edge[s]):
+				if eid is not None:
+					self.uses[eid].discard((s, v))
+		d, pi = dijkstra_csr(C, s, edge_mask=self.edge_mask)
+		children = [[] for _ in range(C.get_card_V())]
+		tree_edge = [None] * C.get_card_V()
+		for v, u in enumerate(pi):
+			if u is not None:
+				children[u].append(v)
+				tree_edge[v] = C.edge_id(u, v)
+				self.uses[tree_edge[v]].add((s, v))
+		self.d[s], self.children[s], self.tree_edge[s] = d, children, tree_edge
+		self.D[s] = d
+
+	def repair_subtree(self, s, v, eid):
+		"""Return the new distances from s of the vertices in the subtree below v, if edge
+		eid, the tree edge into v, were closed.
+
+		Only the subtree below v can change.  Its vertices first take the best distance
+		over in-edges from outside the subtree, and then a Dijkstra search confined to
+		the subtree settles the rest.
+
+		Returns:
+		A dictionary mapping each vertex of the subtree to its new distance, inf if unreachable
+		"""
+		C, R, mask = self.C, self.R, self.edge_mask
+		d, children = self.d[s], self.children[s]
+		subtree = [v]
+		k = 0
+		while k < len(subtree):
+			subtree.extend(children[subtree[k]])
+			k += 1
+		new = dict.fromkeys(subtree, float('inf'))
+
+		queue = []
+		for x in subtree:
+			best = float('inf')
+			for i in range(R.offsets[x], R.offsets[x + 1]):
+				y = R.heads[i]
+				if y not in new and not mask[R.edge_ids[i]] and R.edge_ids[i] != eid:
+					best = min(best, d[y] + R.weights[i])
+			if best < float('inf'):
+				new[x] = best
+				queue.append((best, x))
+		heapify(queue)
+		while queue:
+			dx, x = heappop(queue)
+			if dx > new[x]:  # stale entry
+				continue
+			for i in range(C.offsets[x], C.offsets[x + 1]):
+				z = C.heads[i]
+				if z in new and not mask[C.edge_ids[i]] and C.edge_ids[i] != eid and dx + C.weights[i] < new[z]:
+					new[z] = dx + C.weights[i]
+					heappush(queue, (new[z], z))
+		return new
+
+	def subtree_loss(self, s, v, eid):
+		"""Return the total increase in distances from s, and the number of vertices that
+		become unreachable, if edge eid, the tree edge into v, were closed."""
+		d = self.d[s]
+		new = self.repair_subtree(s, v, eid)
+		unreachable = sum(1 for dx in new.values() if dx == float('inf'))
+		if unreachable:
+			return float('inf'), unreachable
+		return sum(dx - d[x] for x, dx in new.items()), 0
+
+	def source_losses(self, eid):
+		"""Return a dictionary mapping each source whose tree uses edge eid to the increase
+		in its distances if eid were closed, or None if closing it would make some pair
+		unreachable."""
+		losses = {}
+		for s, v in list(self.uses[eid]):
+			loss, unreachable = self.subtree_loss(s, v, eid)
+			if unreachable:
+				return None
+			losses[s] = loss
+		return losses
+
+	def closure_cost(self, eid):
+		"""Return the increase in the total of all-pairs distances if edge eid were closed,
+		or inf if closing it would make some pair unreachable."""
+		losses = self.source_losses(eid)
+		return float('inf') if losses is None else sum(losses.values())
+
+	def close(self, eid):
+		"""Close edge eid and update the trees of the sources that used it."""
+		self.edge_mask[eid] = 1
+		for s in sorted({s for s, _ in self.uses[eid]}):
+			self.search(s)
+
+
+def journey_time_histograms(before, after, num=30):
+	"""Bin the finite journey times before and after closures over a common range, with
+	num bin edges, as Task 4b does for its histograms.
+
+	Returns:
+	edges -- NumPy array of the bin edges
+	before_counts -- NumPy array of the number of pairs in each bin before the closures
+	after_counts -- the same after the closures
+	"""
+	before, after = before[np.isfinite(before)], after[np.isfinite(after)]
+	edges = np.linspace(min(before.min(), after.min()), max(before.max(), after.max()), num=num)
+	return edges, np.histogram(before, edges)[0], np.histogram(after, edges)[0]
+
+
+def optimize_closures(C, target, candidates=None, lazy=True):
+	"""Greedily choose closures that least increase total all-pairs journey time while
+	keeping every connected pair connected.
+
+	Each round closes the candidate whose closure adds the least to the sum of all
+	shortest-path distances.  The cost of a candidate is computed incrementally: only
+	sources whose shortest-path tree uses it are affected, and for each of those only
+	the subtree below it is repaired.
+
+	With lazy, candidates sit in a heap under lower bounds on their costs, and a cost
+	is recomputed only when its candidate reaches the top.  After a closure, the
+	trees that did not use it are unchanged and can only lose routes, so their
+	losses for another candidate can only grow; only the losses in the trees
+	searched again can shrink, so subtracting them from a candidate's last cost
+	gives a lower bound.  Both modes choose the same closures, with ties broken by
+	edge id.
+
+	Arguments:
+	C -- a CSRGraph of the network, with nonnegative weights
+	target -- number of closures to choose
+	candidates -- optional list of (u, v) vertex pairs that may be closed; all edges by default
+	lazy -- whether to recompute only the costs that may have fallen, rather than all of them
+	Returns:
+	A dictionary with the chosen "closures" as (u, v) pairs in order, the "costs" they
+	added to the total, the all-pairs distance matrices "before" and "after",
+	"statistics" comparing them as scenario_statistics does, and "histograms" of the
+	journey times as journey_time_histograms gives them
+	"""
+	forest = ShortestPathForest(C)
+	before = forest.D.copy()
+	if candidates is None:
+		eids = list(range(C.get_card_E()))
+	else:
+		eids = sorted({C.edge_id(u, v) for u, v in candidates} - {None})
+
+	closures, costs = [], []
+	if not lazy:
+		queue = list(eids)
+		while len(closures) < target:
+			queue = [(cost, eid) for cost, eid in ((forest.closure_cost(eid), eid) for eid in queue) if cost < float('inf')]
+			if not queue:
+				break
+			cost, eid = min(queue)
+			queue = [e for _, e in queue if e != eid]
+			forest.close(eid)
+			closures.append(C.edge_endpoints(eid))
+			costs.append(cost)
+	else:
+		losses = {}  # the per-source losses of each candidate when its cost was last computed
+		key = {}  # the live heap entry of each candidate: its cost or a lower bound, and whether exact
+		queue = []
+		for eid in eids:
+			losses[eid] = forest.source_losses(eid)
+			if losses[eid] is not None:  # closures never make an edge removable again
+				key[eid] = (sum(losses[eid].values()), eid, True)
+				queue.append(key[eid])
+		heapify(queue)
+		while len(closures) < target and queue:
+			entry = heappop(queue)
+			cost, eid, exact = entry
+			if key.get(eid) != entry:  # superseded entry
+				continue
+			if not exact:
+				losses[eid] = forest.source_losses(eid)
+				if losses[eid] is None:
+					del key[eid]
+				else:
+					key[eid] = (sum(losses[eid].values()), eid, True)
+					heappush(queue, key[eid])
+				continue
+			del key[eid]
+			sources = {s for s, _ in forest.uses[eid]}
+			forest.close(eid)
+			closures.append(C.edge_endpoints(eid))
+			costs.append(cost)
+			# Subtracting what the searched-again trees added gives a lower bound on the new cost.
+			for e, (cost_e, _, exact) in list(key.items()):
+				bound = cost_e - sum(losses[e][s] for s in sources & losses[e].keys())
+				if exact or bound < cost_e:
+					key[e] = (bound, e, False)
+					heappush(queue, key[e])
+
+	after = forest.D.copy()
+	return {"closures": closures, "costs": costs, "before": before, "after": after,
+			"statistics": scenario_statistics(before, after), "histograms": journey_time_histograms(before, after)}
+
+
+# Testing
+if __name__ == "__main__":
+
+	import random
+	import time
+	from all_pairs_shortest_paths import all_pairs_distances
+	from closure_planner import plan_closures
+	from csr_graph import CSRGraph
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	# Incremental costs should match recomputing all pairs from scratch.
+	graph1 = generate_random_graph(30, 0.2, True, False, True, 1, 10)
+	csr1 = CSRGraph(graph1)
+	forest = ShortestPathForest(csr1)
+	base_total = forest.D[np.isfinite(forest.D)].sum()
+	all_equal = True
+	for eid in range(csr1.get_card_E()):
+		mask = csr1.new_edge_mask()
+		mask[eid] = 1
+		after = all_pairs_distances(csr1, edge_mask=mask)
+		expected = after.sum() - base_total if np.isfinite(after).all() else float('inf')
+		if forest.closure_cost(eid) != expected:
+			all_equal = False
+	print("All incremental closure costs are " + ("not " if not all_equal else "") + "equal")
+
+	# Lazy and eager recomputation choose the same closures.
+	all_equal = True
+	for seed in range(40):
+		random.seed(seed)
+		csr3 = CSRGraph(generate_random_graph(20, 0.3, True, False, True, 1, 10 + seed))
+		lazy, eager = optimize_closures(csr3, 10, lazy=True), optimize_closures(csr3, 10, lazy=False)
+		if lazy["closures"] != eager["closures"] or lazy["costs"] != eager["costs"]:
+			all_equal = False
+	print("All lazy and eager closures are " + ("not " if not all_equal else "") + "equal")
+
+	# Greedy closures on the tube network, compared with Task 4a's MST-based closures.
+	graph2, stations2 = load_london_underground(directed=False)
+	names = list(stations2)
+	csr2 = CSRGraph(graph2)
+	mst_closures = [(u, v) for u, v, _ in plan_closures(graph2).closed_edges]
+	start = time.perf_counter()
+	result = optimize_closures(csr2, len(mst_closures))
+	elapsed = time.perf_counter() - start
+	print(len(result["closures"]), f"closures chosen in {elapsed:.1f} s; the first five:")
+	for (u, v), cost in list(zip(result["closures"], result["costs"]))[:5]:
+		print("   ", names[u], "--", names[v], "adds", cost, "minutes in total")
+	print("Greedy:", {key: round(value, 2) for key, value in result["statistics"].items()})
+	edges, before_counts, after_counts = result["histograms"]
+	print("Pairs per bin from", edges[0], "to", edges[-1], "minutes:")
+	print("    before:", before_counts.tolist())
+	print("    after: ", after_counts.tolist())
+	mst_after = all_pairs_distances(csr2, edge_mask=csr2.mask_edges(mst_closures))
+	print("Task 4a:", {key: round(value, 2) for key, value in scenario_statistics(result["before"], mst_after).items()})
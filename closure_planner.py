@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# closure_planner.py
+
+import numpy as np
+from bridges import bridges_and_articulation_points
+from csr_graph import CSRGraph
+from disjoint_set_forest import DisjointSetArray
+from mst import edge_arrays, kruskal_edge_arrays
+
+
+class ClosurePlan:
+
+	def __init__(self, closed_edges, kept_edges, component_count, original_component_count):
+		"""Initialize the result of closure planning.
+
+		Arguments:
+		closed_edges -- list of (u, v, weight) edges recommended for closure
+		kept_edges -- list of (u, v, weight) edges that stay open
+		component_count -- number of connected components of the network after the closures
+		original_component_count -- number of connected components before the closures
+		"""
+		self.closed_edges = closed_edges
+		self.kept_edges = kept_edges
+		self.component_count = component_count
+		self.original_component_count = original_component_count
+
+	def is_connected(self):
+		"""Return True if the network is connected after the closures."""
+		return self.component_count == 1
+
+	def preserves_connectivity(self):
+		"""Return True if the closures disconnect no stations that were connected before."""
+		return self.component_count == self.original_component_count
+
+	def named_closures(self, names):
+		"""Return the closed edges as (station, station) name pairs, given a list of station names."""
+		return [(names[u], names[v]) for u, v, _ in self.closed_edges]
+
+
+def _component_count(C, closed=None):
+	"""Return the number of connected components of an undirected CSRGraph, skipping the
+	edges marked in the optional edge mask closed."""
+	forest = DisjointSetArray(C.get_card_V())
+	kept = [eid for eid in range(C.get_card_E()) if closed is None or not closed[eid]]
+	forest.union_many([C.tails[eid] for eid in kept], [C.ends[eid] for eid in kept])
+	return forest.get_count()
+
+
+def plan_closures(G):
+	"""Recommend closing every edge of an undirected, weighted graph that is not in its
+	minimum spanning tree, found by Kruskal's algorithm.
+
+	Membership in the tree is tested with a mask over the edge array, rather than by
+	searching the tree's edge list for every edge.  The closures are then checked
+	against G itself rather than the edge arrays: the components of G with the closed
+	edges masked out are counted with one union-find pass, and compared with the
+	components of G.
+
+	Arguments:
+	G -- an undirected, weighted graph implemented with adjacency lists
+	Returns:
+	A ClosurePlan
+	"""
+	if G.is_directed():
+		raise RuntimeError("Graph should be undirected.")
+	card_V = G.get_card_V()
+	u, v, weight = edge_arrays(G)
+	in_tree = np.zeros(len(u), dtype=bool)
+	in_tree[kruskal_edge_arrays(card_V, u, v, weight)] = True
+	edges = list(zip(u.tolist(), v.tolist(), weight.tolist()))
+
+	kept = np.flatnonzero(in_tree)
+	closed_edges = [edges[k] for k in np.flatnonzero(~in_tree)]
+
+	# Check the network that remains after the closures against the original.
+	C = CSRGraph(G)
+	closed = C.mask_edges([(a, b) for a, b, _ in closed_edges])
+	return ClosurePlan(closed_edges, [edges[k] for k in kept], _component_count(C, closed), _component_count(C))
+
+
+def classify_closures(G, candidates):
+	"""Classify candidate closures of an undirected graph in O(V + E) time, using its
+	bridges instead of a connectivity search per candidate.
+
+	A candidate that is a bridge would disconnect the network on its own.  The others
+	are safe one at a time, but several of them closed together can still disconnect
+	stations, so the components of the network with every candidate closed are
+	counted as well, and compared with those of the network without closures.
+
+	Arguments:
+	G -- an undirected graph implemented with adjacency lists, or a CSRGraph snapshot of one
+	candidates -- iterable of (u, v) vertex pairs
+	Returns:
+	A dictionary with lists of the "safe" and "bridge" candidates, the "missing"
+	candidates that are not edges of G, the "articulation_points" of G, the
+	"component_count" with every candidate closed and the "original_component_count"
+	without closures, and "connected_after_all", whether closing every candidate
+	disconnects no stations that were connected before
+	"""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	bridges, points = bridges_and_articulation_points(C)
+	is_bridge = bytearray(C.get_card_E())
+	for eid in bridges:
+		is_bridge[eid] = 1
+
+	result = {"safe": [], "bridge": [], "missing": [], "articulation_points": points}
+	closed = C.new_edge_mask()
+	for u, v in candidates:
+		eid = C.edge_id(u, v)
+		if eid is None:
+			result["missing"].append((u, v))
+		else:
+			result["bridge" if is_bridge[eid] else "safe"].append((u, v))
+			closed[eid] = 1
+
+	result["component_count"] = _component_count(C, closed)
+	result["original_component_count"] = _component_count(C)
+	result["connected_after_all"] = result["component_count"] == result["original_component_count"]
+	return result
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from adjacency_list_graph import AdjacencyListGraph
+	from london_underground import load_london_underground
+	from mst import kruskal
+
+	graph1, stations1 = load_london_underground(directed=False)
+	names = list(stations1)
+	start = time.perf_counter()
+	plan = plan_closures(graph1)
+	elapsed = time.perf_counter() - start
+	print(len(plan.closed_edges), "closures,", len(plan.kept_edges), "segments kept, connected:", plan.is_connected(),
+		  "preserves connectivity:", plan.preserves_connectivity())
+	print(plan.named_closures(names)[:3])
+	print(f"Planned in {elapsed * 1e3:.2f} ms")
+
+	# Same closures as testing every edge against kruskal's edge list.
+	mst_edges = kruskal(graph1).get_edge_list()
+	expected = [edge for edge in graph1.get_edge_list() if edge not in mst_edges]
+	print(expected == [(u, v) for u, v, _ in plan.closed_edges])
+
+	# Classify some candidate closures, including a branch terminus that is a bridge.
+	candidates = [(stations1[a], stations1[b]) for a, b in
+				  [('Oxford Circus', 'Green Park'), ('Grange Hill', 'Hainault'), ('Harrow & Wealdstone', 'Kenton'),
+				   ('Bank', 'Upminster')]]
+	classified = classify_closures(graph1, candidates)
+	for key in ("safe", "bridge", "missing"):
+		print(key, [(names[u], names[v]) for u, v in classified[key]])
+	print(classified["connected_after_all"])
+	print(classify_closures(graph1, [(u, v) for u, v, _ in plan.closed_edges])["bridge"] == [])
+
+	# The check would fail if a closure disconnected stations, here by closing a bridge as well.
+	C1 = CSRGraph(graph1)
+	closed1 = C1.mask_edges([(u, v) for u, v, _ in plan.closed_edges] + classified["bridge"])
+	print(_component_count(C1, closed1) > plan.original_component_count)
+
+	# On a network that is already disconnected, closures that cut nothing keep it connected as before.
+	graph2 = AdjacencyListGraph(6, False, True)
+	for a, b in ((0, 1), (1, 2), (2, 0), (3, 4)):
+		graph2.insert_edge(a, b, 1)
+	print(classify_closures(graph2, [(0, 1)])["connected_after_all"], classify_closures(graph2, [(3, 4)])["connected_after_all"])
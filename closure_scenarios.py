@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# closure_scenarios.py
+
+import os
+from heapq import heappush, heappop, heapify
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from dijkstra import dijkstra_csr
+
+
+class ScenarioBase:
+
+	def __init__(self, C):
+		"""Compute the pre-closure all-pairs distances of a network once, along with the
+		shortest-path tree from every source, for reuse by every scenario.
+
+		Arguments:
+		C -- a CSRGraph of the network, with nonnegative weights
+		"""
+		self.C = C
+		self.R = C.transpose() if C.is_directed() else C  # in-edges, for repairing subtrees
+		card_V = C.get_card_V()
+		self.D = np.empty((card_V, card_V))
+		# tree_edges[s, v] is the id of the edge from v's predecessor in the tree from s, or card_E for none.
+		self.tree_edges = np.full((card_V, card_V), C.get_card_E(), dtype=np.intp)
+		self.parents = np.full((card_V, card_V), -1, dtype=np.intp)
+		self.orders = []  # the vertices reached from each source, parents before children
+		for s in range(card_V):
+			d, pi = dijkstra_csr(C, s)
+			self.D[s] = d
+			children = [[] for _ in range(card_V)]
+			for v in range(card_V):
+				if pi[v] is not None:
+					self.tree_edges[s, v] = C.edge_id(pi[v], v)
+					self.parents[s, v] = pi[v]
+					children[pi[v]].append(v)
+			order = [s]
+			for u in order:
+				order.extend(children[u])
+			self.orders.append(order)
+
+	def distances_after(self, edge_mask):
+		"""Return the all-pairs distances with the masked edges closed, and the number of
+		sources affected.  Only sources whose shortest-path tree uses a closed edge are
+		affected, and from each of those only the vertices below a closed tree edge can
+		change.  They are repaired on their own when they are at most half of the tree,
+		and otherwise the source is searched again."""
+		closed = np.zeros(self.C.get_card_E() + 1, dtype=bool)
+		closed[:-1] = np.frombuffer(bytes(edge_mask), dtype=np.uint8) != 0
+		cut = closed[self.tree_edges]
+		affected = np.flatnonzero(cut.any(axis=1))
+		D = self.D.copy()
+		for s in affected.tolist():
+			below = self.cut_off(s, cut[s].tolist())
+			if 2 * len(below) > len(self.orders[s]):
+				D[s] = dijkstra_csr(self.C, s, edge_mask=edge_mask)[0]
+			else:
+				for x, dx in self.repair(s, below, edge_mask).items():
+					D[s, x] = dx
+		return D, len(affected)
+
+	def cut_off(self, s, cut):
+		"""Return the vertices below a closed edge of the tree from s, given a list of
+		whether the tree edge into each vertex is closed; parents come before children."""
+		parents = self.parents[s].tolist()
+		below = []
+		for v in self.orders[s]:
+			if cut[v] or (parents[v] >= 0 and cut[parents[v]]):
+				cut[v] = True
+				below.append(v)
+		return below
+
+	def repair(self, s, below, edge_mask):
+		"""Return the new distances from s of the vertices below closed edges of the tree
+		from s, as ShortestPathForest.repair_subtree does for one edge.
+
+		Those vertices first take the best distance over open in-edges from the rest of
+		the tree, and then a Dijkstra search confined to them settles the rest.
+
+		Arguments:
+		s -- source vertex
+		below -- the vertices below closed tree edges, as cut_off gives them
+		edge_mask -- mask indexed by edge id of the closed edges
+		Returns:
+		A dictionary mapping each vertex of below to its new distance, inf if unreachable
+		"""
+		C, R = self.C, self.R
+		d = self.D[s].tolist()
+		new = dict.fromkeys(below, float('inf'))
+
+		queue = []
+		for x in below:
+			best = float('inf')
+			for i in range(R.offsets[x], R.offsets[x + 1]):
+				y = R.heads[i]
+				if y not in new and not edge_mask[R.edge_ids[i]]:
+					best = min(best, d[y] + R.weights[i])
+			if best < float('inf'):
+				new[x] = best
+				queue.append((best, x))
+		heapify(queue)
+		while queue:
+			dx, x = heappop(queue)
+			if dx > new[x]:  # stale entry
+				continue
+			for i in range(C.offsets[x], C.offsets[x + 1]):
+				z = C.heads[i]
+				if z in new and not edge_mask[C.edge_ids[i]] and dx + C.weights[i] < new[z]:
+					new[z] = dx + C.weights[i]
+					heappush(queue, (new[z], z))
+		return new
+
+
+def scenario_statistics(before, after, percentiles=(50, 90, 99)):
+	"""Summarize how journey times change between two all-pairs distance matrices.
+
+	Only pairs of distinct stations that were connected before are counted.
+
+	Returns:
+	A dictionary with the mean journey time before and after (over pairs still
+	connected), the mean, maximum, and percentiles of the change, the number of
+	pairs whose journey got longer, and the number of newly unreachable pairs
+	"""
+	connected = np.isfinite(before)
+	np.fill_diagonal(connected, False)
+	still = connected & np.isfinite(after)
+	change = after[still] - before[still]
+	stats = {
+		"pairs": int(connected.sum()),
+		"newly_unreachable": int(connected.sum() - still.sum()),
+		"longer_journeys": int((change > 0).sum()),
+		"mean_before": float(before[still].mean()) if change.size else 0.0,
+		"mean_after": float(after[still].mean()) if change.size else 0.0,
+		"mean_change": float(change.mean()) if change.size else 0.0,
+		"max_change": float(change.max()) if change.size else 0.0,
+	}
+	for p, value in zip(percentiles, np.percentile(change, percentiles) if change.size else [0.0] * len(percentiles)):
+		stats["p" + str(p) + "_change"] = float(value)
+	return stats
+
+
+# The base is read-only, and is handed to each worker process once when it starts.
+_worker_base = None
+
+
+def _init_worker(base):
+	global _worker_base
+	_worker_base = base
+
+
+def _evaluate(closures):
+	return evaluate_scenario(_worker_base, closures)
+
+
+def evaluate_scenario(base, closures):
+	"""Evaluate one closure scenario against a ScenarioBase.
+
+	Arguments:
+	base -- a ScenarioBase
+	closures -- iterable of (u, v) vertex pairs to close; in a directed graph both
+	directions are closed, as for a track shut in both directions, and pairs that
+	are not edges are ignored.  Note that most_vital_edges in replacement_paths
+	instead closes one direction of a directed graph at a time.
+	Returns:
+	The dictionary of scenario_statistics, plus the number of closed edges and of
+	sources whose distances had to be repaired or searched again
+	"""
+	mask = base.C.mask_edges(closures)
+	after, searched = base.distances_after(mask)
+	stats = scenario_statistics(base.D, after)
+	stats["closed_edges"] = sum(mask)
+	stats["sources_searched"] = searched
+	return stats
+
+
+def evaluate_scenarios(C, scenarios, processes=None, base=None):
+	"""Evaluate many closure scenarios against one network, masking edges rather than
+	deleting them, optionally in a pool of processes that share the base network.
+
+	Arguments:
+	C -- a CSRGraph of the network, with nonnegative weights
+	scenarios -- list of closure lists, each a list of (u, v) vertex pairs
+	processes -- number of worker processes; 1 evaluates in this process, and the
+	default is the number of CPUs
+	base -- optional ScenarioBase for C, to reuse across calls
+	Returns:
+	A list with the statistics dictionary of each scenario, in order
+	"""
+	if base is None:
+		base = ScenarioBase(C)
+	if processes is None:
+		processes = os.cpu_count() or 1
+	if processes <= 1 or len(scenarios) <= 1:
+		return [evaluate_scenario(base, closures) for closures in scenarios]
+	with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(base,)) as executor:
+		return list(executor.map(_evaluate, scenarios, chunksize=max(1, len(scenarios) // (4 * processes))))
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from random import Random
+	from all_pairs_shortest_paths import all_pairs_distances
+	from closure_planner import plan_closures
+	from csr_graph import CSRGraph
+	from london_underground import load_london_underground
+
+	graph1, stations1 = load_london_underground(directed=False)
+	csr1 = CSRGraph(graph1)
+	start = time.perf_counter()
+	base = ScenarioBase(csr1)
+	print(f"Base computed in {time.perf_counter() - start:.2f} s")
+
+	# Task 4a's closures, against deleting the edges and recomputing everything.
+	closures = [(u, v) for u, v, _ in plan_closures(graph1).closed_edges]
+	stats = evaluate_scenario(base, closures)
+	print(stats)
+	graph2 = graph1.copy()
+	for u, v in closures:
+		graph2.delete_edge(u, v)
+	expected = scenario_statistics(base.D, all_pairs_distances(CSRGraph(graph2)))
+	print(all(stats[key] == value for key, value in expected.items()))
+
+	# Repaired distances match recomputing all pairs with the edges masked, directed and undirected.
+	rng = Random(1)
+	graph3, _ = load_london_underground()
+	csr3 = CSRGraph(graph3)
+	all_equal = True
+	for C, B in ((csr1, base), (csr3, ScenarioBase(csr3))):
+		for _ in range(10):
+			mask = C.mask_edges([C.edge_endpoints(eid) for eid in rng.sample(range(C.get_card_E()), rng.randint(1, 40))])
+			if not np.array_equal(B.distances_after(mask)[0], all_pairs_distances(C, edge_mask=mask)):
+				all_equal = False
+	print("All repaired distances are " + ("not " if not all_equal else "") + "equal")
+
+	# Single closures, repaired against recomputing all pairs.
+	singles = [[csr1.edge_endpoints(eid)] for eid in rng.sample(range(csr1.get_card_E()), 30)]
+	for name, distances in (("repaired", lambda mask: base.distances_after(mask)[0]),
+							("recomputed", lambda mask: all_pairs_distances(csr1, edge_mask=mask))):
+		start = time.perf_counter()
+		for closures1 in singles:
+			distances(csr1.mask_edges(closures1))
+		print(f"{len(singles)} single closures {name} in {time.perf_counter() - start:.2f} s")
+
+	# 100 random subsets of those closures.  The pool helps only on a machine with several CPUs.
+	scenarios = [rng.sample(closures, rng.randint(1, len(closures))) for _ in range(100)]
+	for processes in (1, 2):
+		start = time.perf_counter()
+		results = evaluate_scenarios(csr1, scenarios, processes, base)
+		print(f"{len(scenarios)} scenarios with {processes} process(es) in {time.perf_counter() - start:.2f} s "
+			  f"on {os.cpu_count()} CPU(s)")
+	worst = max(range(len(results)), key=lambda k: results[k]["mean_change"])
+	print(len(scenarios[worst]), "closures, mean change", results[worst]["mean_change"])
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# csr_graph.py
+
+class CSRGraph:
+
+	def __init__(self, G, unit_weights=False):
+		"""Take a read-only compressed sparse row (CSR) snapshot of a graph.
+
+		The out-edges of vertex u occupy slots offsets[u] through offsets[u+1] - 1
+		of the heads, weights, and edge_ids lists.  Every slot carries the id of
+		the logical edge it belongs to, so that both directions of an undirected
+		edge share one id.  Searches skip edges by testing a mask indexed by
+		edge id, rather than copying the graph and deleting edges from the copy.
+
+		Arguments:
+		G -- a graph implemented with adjacency lists
+		unit_weights -- if True, give every edge weight 1 (hop counts)
+		"""
+		self.card_V = G.get_card_V()
+		self.directed = G.is_directed()
+		self.weighted = G.is_weighted() and not unit_weights
+		self.version = G.get_version()
+
+		self.offsets = [0] * (self.card_V + 1)
+		self.heads = []
+		self.weights = []
+		self.edge_ids = []
+		self.tails = []  # tails[eid] and ends[eid] are the endpoints of logical edge eid
+		self.ends = []
+		ids = {}
+		for u in range(self.card_V):
+			for edge in G.get_adj_list(u):
+				v = edge.get_v()
+				if self.directed or u < v:
+					ids[(u, v)] = len(self.tails)
+					self.tails.append(u)
+					self.ends.append(v)
+				self.heads.append(v)
+				self.weights.append(edge.get_weight() if self.weighted else 1)
+			self.offsets[u + 1] = len(self.heads)
+		for u in range(self.card_V):
+			for i in range(self.offsets[u], self.offsets[u + 1]):
+				v = self.heads[i]
+				self.edge_ids.append(ids[(u, v)] if self.directed or u < v else ids[(v, u)])
+		self.ids = ids
+
+	def get_card_V(self):
+		"""Return the number of vertices in this graph."""
+		return self.card_V
+
+	def get_card_E(self):
+		"""Return the number of logical edges in this graph."""
+		return len(self.tails)
+
+	def is_directed(self):
+		"""Return a boolean indicating whether this graph is directed."""
+		return self.directed
+
+	def is_weighted(self):
+		"""Return a boolean indicating whether this graph is weighted."""
+		return self.weighted
+
+	def is_current(self, G):
+		"""Return True if this snapshot reflects the current version of G."""
+		return self.version == G.get_version()
+
+	def edge_id(self, u, v):
+		"""Return the id of the logical edge (u, v), or None if there is no such edge."""
+		if not self.directed and u > v:
+			u, v = v, u
+		return self.ids.get((u, v))
+
+	def edge_endpoints(self, eid):
+		"""Return the endpoints (u, v) of the logical edge with id eid."""
+		return self.tails[eid], self.ends[eid]
+
+	def edge_weight(self, eid):
+		"""Return the weight of the logical edge with id eid."""
+		u, v = self.tails[eid], self.ends[eid]
+		for i in range(self.offsets[u], self.offsets[u + 1]):
+			if self.heads[i] == v:
+				return self.weights[i]
+
+	def new_edge_mask(self):
+		"""Return an edge mask with no edge masked out."""
+		return bytearray(self.get_card_E())
+
+	def mask_edges(self, pairs, mask=None, both_directions=True):
+		"""Mask out the edges given as (u, v) vertex pairs.  Pairs naming no edge are
+		ignored, as delete_edge does.  In a directed graph, both_directions also masks (v, u).
+
+		Arguments:
+		pairs -- iterable of (u, v) pairs
+		mask -- mask to update; a new mask is made if omitted
+		both_directions -- whether to mask (v, u) as well in a directed graph
+		Returns:
+		The updated mask
+		"""
+		if mask is None:
+			mask = self.new_edge_mask()
+		for u, v in pairs:
+			for a, b in ((u, v), (v, u)) if both_directions else ((u, v),):
+				eid = self.edge_id(a, b)
+				if eid is not None:
+					mask[eid] = 1
+		return mask
+
+	def transpose(self):
+		"""Return a snapshot of the transpose of this graph, keeping the edge ids."""
+		xpose = CSRGraph.__new__(CSRGraph)
+		xpose.card_V = self.card_V
+		xpose.directed = self.directed
+		xpose.weighted = self.weighted
+		xpose.version = self.version
+		xpose.tails, xpose.ends = self.ends, self.tails
+		xpose.ids = {(v, u): eid for (u, v), eid in self.ids.items()} if self.directed else self.ids
+		counts = [0] * (self.card_V + 1)
+		for v in self.heads:
+			counts[v + 1] += 1
+		for v in range(self.card_V):
+			counts[v + 1] += counts[v]
+		xpose.offsets = counts[:]
+		slots = len(self.heads)
+		xpose.heads, xpose.weights, xpose.edge_ids = [0] * slots, [0] * slots, [0] * slots
+		for u in range(self.card_V):
+			for i in range(self.offsets[u], self.offsets[u + 1]):
+				v = self.heads[i]
+				j = counts[v]
+				counts[v] += 1
+				xpose.heads[j] = u
+				xpose.weights[j] = self.weights[i]
+				xpose.edge_ids[j] = self.edge_ids[i]
+		return xpose
+
+	def with_unit_weights(self):
+		"""Return a snapshot of this graph with every edge weight 1, sharing the structure
+		and keeping the edge ids."""
+		unit = CSRGraph.__new__(CSRGraph)
+		unit.__dict__.update(self.__dict__)
+		unit.weighted = False
+		unit.weights = [1] * len(self.weights)
+		return unit
+
+
+def csr_snapshot(G, unit_weights=False):
+	"""Return a CSRGraph of G, which may be a graph implemented with adjacency lists or
+	a CSRGraph snapshot already, with every edge weight 1 if unit_weights is True."""
+	if not isinstance(G, CSRGraph):
+		return CSRGraph(G, unit_weights)
+	return G.with_unit_weights() if unit_weights else G
+
+
+# Testing
+if __name__ == "__main__":
+
+	from adjacency_list_graph import AdjacencyListGraph
+
+	vertices = ['s', 't', 'x', 'y', 'z']
+	edges = [('s', 't', 10), ('s', 'y', 5), ('t', 'x', 1), ('t', 'y', 2), ('x', 'z', 4),
+			('y', 't', 3), ('y', 'x', 9), ('y', 'z', 2), ('z', 's', 7), ('z', 'x', 6)]
+	graph1 = AdjacencyListGraph(len(vertices), True, True)
+	for edge in edges:
+		graph1.insert_edge(vertices.index(edge[0]), vertices.index(edge[1]), edge[2])
+	csr1 = CSRGraph(graph1)
+	print(csr1.offsets, csr1.heads, csr1.weights, csr1.edge_ids)
+	print(csr1.get_card_E() == graph1.get_card_E())
+	xpose1 = csr1.transpose()
+	print(xpose1.offsets, xpose1.heads, xpose1.weights, xpose1.edge_ids)
+
+	# Both directions of an undirected edge share an id.
+	graph2 = AdjacencyListGraph(4, False, True)
+	graph2.insert_edge(0, 1, 3)
+	graph2.insert_edge(1, 2, 4)
+	graph2.insert_edge(2, 3, 5)
+	csr2 = CSRGraph(graph2)
+	print(csr2.edge_ids, csr2.edge_id(1, 0) == csr2.edge_id(0, 1))
+	print(list(csr2.mask_edges([(2, 1)])))
+
+	# A unit-weight view of a snapshot matches a unit-weight snapshot of the graph.
+	unit1 = csr_snapshot(csr1, unit_weights=True)
+	print(vars(unit1) == vars(CSRGraph(graph1, unit_weights=True)), csr1.weights != unit1.weights)
@@ -30,6 +30,7 @@
 #                                                                       #
 #########################################################################
 
+from heapq import heappush, heappop
 from adjacency_list_graph import *
 from bellman_ford import bellman_ford
 
@@ -65,6 +66,101 @@ def difference_constraints(constraints):
     return feasible, d[1:]
 
 
+class DifferenceConstraintSystem:
+
+    def __init__(self):
+        """Initialize an empty system of difference constraints that keeps its constraint
+        graph and a feasible solution between calls.
+
+        Each constraint xi - xj <= w is the edge (vj, vi) with weight w.  The solution
+        serves as a set of potentials: it is feasible exactly when every edge has
+        nonnegative reduced weight x[j] + w - x[i].  Adding a constraint repairs the
+        solution with a Dijkstra-like search over the reduced weights that visits
+        only the variables whose values must decrease, in the manner of Cotton and
+        Maler, and finds a negative-weight cycle if there is one.  Removing a
+        constraint never makes a feasible solution infeasible, so it needs no repair.
+        As with difference_constraints, variables are numbered from 1 and every
+        value starts at 0, as if there were an edge of weight 0 from v0.
+        """
+        self.x = [0]           # x[i] is the current value of variable xi; x[0] is unused
+        self.out = [{}]        # out[j][i] is the tightest bound w over constraints xi - xj <= w
+        self.bounds = {}       # (i, j) -> list of the bounds of all constraints xi - xj <= w
+
+    def ensure_variable(self, i):
+        """Make sure that variable xi exists."""
+        while len(self.x) <= i:
+            self.x.append(0)
+            self.out.append({})
+
+    def add_constraint(self, i, j, w):
+        """Add the constraint xi - xj <= w, updating the solution incrementally.
+
+        If the constraint would make the system infeasible, it is not added and the
+        system is left unchanged.
+
+        Returns:
+        feasible -- True if the constraint was added
+        cycle -- None if feasible, otherwise a list of variable indices on a
+        negative-weight cycle, starting with j and i, in which each variable
+        has a constraint edge to the next and the last to the first; just [i]
+        for a constraint xi - xi <= w with w < 0
+        """
+        self.ensure_variable(max(i, j))
+        if i == j and w < 0:  # a negative self-loop, which the repair below never reaches
+            return False, [i]
+        x, out = self.x, self.out
+        if x[i] > x[j] + w:
+            # delta[v] is the (negative) change that v's value needs; the most negative is settled first.
+            delta = {i: x[j] + w - x[i]}
+            parent = {i: j}
+            updated = {}
+            queue = [(delta[i], i)]
+            while queue:
+                dv, v = heappop(queue)
+                if v in updated:
+                    continue
+                updated[v] = x[v] + dv
+                for y, wy in out[v].items():
+                    dy = updated[v] + wy - x[y]
+                    if dy < 0 and y not in updated and dy < delta.get(y, 0):
+                        parent[y] = v
+                        if y == j:  # j would have to decrease below itself: a negative-weight cycle
+                            cycle = [j]
+                            while cycle[-1] != i:
+                                cycle.append(parent[cycle[-1]])
+                            cycle = [j] + cycle[:0:-1]
+                            return False, cycle
+                        delta[y] = dy
+                        heappush(queue, (dy, y))
+            for v, xv in updated.items():
+                x[v] = xv
+
+        self.bounds.setdefault((i, j), []).append(w)
+        if i not in out[j] or w < out[j][i]:
+            out[j][i] = w
+        return True, None
+
+    def remove_constraint(self, i, j, w):
+        """Remove one constraint xi - xj <= w.  Error if there is no such constraint."""
+        bounds = self.bounds.get((i, j))
+        if bounds is None or w not in bounds:
+            raise RuntimeError("No constraint x" + str(i) + " - x" + str(j) + " <= " + str(w) + ".")
+        bounds.remove(w)
+        if bounds:
+            self.out[j][i] = min(bounds)
+        else:
+            del self.bounds[(i, j)]
+            del self.out[j][i]
+
+    def get_solution(self):
+        """Return a list of the current solution values x1, x2, ..., xn."""
+        return self.x[1:]
+
+    def is_satisfied(self):
+        """Return True if the current solution satisfies every constraint."""
+        return all(self.x[i] - self.x[j] <= w for j in range(len(self.out)) for i, w in self.out[j].items())
+
+
 # Testing
 if __name__ == "__main__":
     # Example from textbook.
@@ -76,3 +172,50 @@ if __name__ == "__main__":
     constraints2 = [(1, 2, 0), (1, 5, -1), (2, 5, 1), (3, 1, 4),
                     (4, 1, 4), (4, 3, -1), (5, 3, -3), (5, 4, -3)]
     print(difference_constraints(constraints2))
+
+    # The incremental solver should agree about feasibility and report the cycle.
+    system = DifferenceConstraintSystem()
+    for constraint in constraints2:
+        feasible, cycle = system.add_constraint(*constraint)
+        if not feasible:
+            print("Rejected", constraint, "with cycle", cycle)
+    print(system.get_solution(), system.is_satisfied())
+    system.remove_constraint(3, 1, 4)
+    print(system.add_constraint(3, 1, 5), system.get_solution(), system.is_satisfied())
+
+    # A negative self-constraint is infeasible for both solvers.
+    print(difference_constraints([(1, 1, -1)]), DifferenceConstraintSystem().add_constraint(1, 1, -1))
+
+    # Benchmark: adding constraints one at a time, re-solving incrementally versus from scratch.
+    import time
+    from random import Random
+    rng = Random(1)
+    n, m = 100, 3000
+    hidden = [rng.randint(0, 1000) for _ in range(n + 1)]
+    constraints3 = []
+    pairs = set()
+    while len(constraints3) < m:
+        i, j = rng.sample(range(1, n + 1), 2)
+        if (i, j) in pairs:  # difference_constraints allows one constraint per pair
+            continue
+        pairs.add((i, j))
+        # Mostly consistent with the hidden solution, occasionally too tight.
+        w = hidden[i] - hidden[j] + (rng.randint(0, 50) if rng.random() < 0.98 else -rng.randint(1, 50))
+        constraints3.append((i, j, w))
+
+    system = DifferenceConstraintSystem()
+    accepted = []
+    start = time.perf_counter()
+    for constraint in constraints3:
+        if system.add_constraint(*constraint)[0]:
+            accepted.append(constraint)
+    incremental_time = time.perf_counter() - start
+    print(len(accepted), "of", m, "constraints accepted; solution satisfies them:", system.is_satisfied())
+
+    # Re-solving from scratch after every addition: time a sample of the re-solves and extrapolate.
+    checkpoints = range(m // 10, m + 1, m // 10)
+    start = time.perf_counter()
+    for k in checkpoints:
+        difference_constraints(accepted[:k])
+    scratch_time = (time.perf_counter() - start) / len(checkpoints) * m
+    print(f"Incremental: {incremental_time:.3f} s total, from scratch: about {scratch_time:.1f} s total")
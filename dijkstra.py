@@ -30,6 +30,7 @@
 #                                                                       #
 #########################################################################
 
+from heapq import heappush, heappop
 from single_source_shortest_paths import initialize_single_source, relax
 from min_heap_priority_queue import MinHeapPriorityQueue
 
@@ -69,6 +70,57 @@ def dijkstra(G, s):
 	return d, pi
 
 
+def dijkstra_csr(C, s, targets=None, edge_mask=None):
+	"""Solve single-source shortest-paths problem on a CSR snapshot, using a binary
+	heap with lazy deletion: only discovered vertices are pushed, and stale heap
+	entries are skipped when popped.
+
+	Arguments:
+	C -- a CSRGraph with nonnegative weights
+	s -- index of source vertex
+	targets -- optional iterable of vertices; the search stops once all of them are settled
+	edge_mask -- optional mask indexed by edge id; edges with a nonzero entry are skipped
+	Returns:
+	d -- distances from source vertex s; exact for settled vertices, upper bounds otherwise
+	pi -- predecessors
+	"""
+	offsets, heads, weights, edge_ids = C.offsets, C.heads, C.weights, C.edge_ids
+	d, pi = initialize_single_source(C, s)
+	settled = bytearray(C.get_card_V())
+
+	remaining = 0
+	if targets is not None:
+		is_target = bytearray(C.get_card_V())
+		for t in targets:
+			if not is_target[t]:
+				is_target[t] = 1
+				remaining += 1
+		if remaining == 0:
+			return d, pi
+
+	queue = [(0, s)]
+	while queue:
+		du, u = heappop(queue)
+		if settled[u]:  # stale entry
+			continue
+		settled[u] = 1
+		if remaining and is_target[u]:
+			remaining -= 1
+			if remaining == 0:
+				break
+		for i in range(offsets[u], offsets[u + 1]):
+			if edge_mask is not None and edge_mask[edge_ids[i]]:
+				continue
+			v = heads[i]
+			dv = du + weights[i]
+			if dv < d[v]:
+				d[v] = dv
+				pi[v] = u
+				heappush(queue, (dv, v))
+
+	return d, pi
+
+
 # Testing
 if __name__ == "__main__":
 
@@ -101,4 +153,13 @@ if __name__ == "__main__":
 			print("Shortest-path distances mismatch for source vertex", s)
 			all_equal = False
 		# Don't check whether pi values are equal because shortest paths might not be unique.
-	print("All shortest-path distances are " + ("not " if not all_equal else "") + "equal")
\ No newline at end of file
+	print("All shortest-path distances are " + ("not " if not all_equal else "") + "equal")
+
+	# The CSR version should agree, and stop early once its targets are settled.
+	from csr_graph import CSRGraph
+	csr2 = CSRGraph(graph2)
+	all_equal = all(dijkstra_csr(csr2, s)[0] == dijkstra(graph2, s)[0] for s in range(card_V))
+	print("All CSR shortest-path distances are " + ("not " if not all_equal else "") + "equal")
+	d, pi = dijkstra(graph2, 0)
+	d_early, pi_early = dijkstra_csr(csr2, 0, targets=[1, 2])
+	print(d_early[1] == d[1] and d_early[2] == d[2])
\ No newline at end of file
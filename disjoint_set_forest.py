@@ -50,10 +50,14 @@ def make_set(x):
 
 
 def find_set(x):
-	"""Return the object that serves as the root of the set containing x."""
-	if x != x.parent:  # the root is its own parent
-		x.parent = find_set(x.parent)
-	return x.parent  # return the root
+	"""Return the object that serves as the root of the set containing x.
+	Iterative, so that long find paths cannot exceed the recursion limit."""
+	root = x
+	while root != root.parent:  # the root is its own parent
+		root = root.parent
+	while x != root:  # path compression: point every node on the find path at the root
+		x.parent, x = root, x.parent
+	return root  # return the root
 
 
 def union(x, y):
@@ -82,6 +86,100 @@ def link(x, y):
 			y.rank += 1
 
 
+class DisjointSetArray:
+
+	def __init__(self, n):
+		"""Initialize n singleton sets {0}, {1}, ..., {n-1}, kept in parent and rank
+		arrays instead of ForestNode objects.
+
+		Arguments:
+		n -- number of elements
+		"""
+		self.parent = list(range(n))
+		self.rank = [0] * n
+		self.size = [1] * n
+		self.count = n  # number of disjoint sets
+
+	def find(self, x):
+		"""Return the root of the set containing x, halving the find path on the way."""
+		parent = self.parent
+		while parent[x] != x:
+			parent[x] = parent[parent[x]]
+			x = parent[x]
+		return x
+
+	def union(self, x, y):
+		"""Unite the sets containing x and y by rank.  Return True if they were different sets."""
+		x = self.find(x)
+		y = self.find(y)
+		if x == y:
+			return False
+		# The root with larger rank becomes the parent of the root with the smaller rank.
+		if self.rank[x] > self.rank[y]:
+			x, y = y, x
+		self.parent[x] = y
+		self.size[y] += self.size[x]
+		if self.rank[x] == self.rank[y]:
+			self.rank[y] += 1
+		self.count -= 1
+		return True
+
+	def same_set(self, x, y):
+		"""Return True if x and y are in the same set."""
+		return self.find(x) == self.find(y)
+
+	def union_many(self, xs, ys, stop_at_count=None):
+		"""Unite the sets of each pair xs[k], ys[k] in turn.
+
+		Arguments:
+		xs, ys -- sequences of elements of equal length
+		stop_at_count -- optional number of sets at which to stop early
+		Returns:
+		A list of the indices k of the pairs that united two different sets
+		"""
+		parent, rank, size = self.parent, self.rank, self.size
+		united = []
+		if stop_at_count is not None and self.count <= stop_at_count:
+			return united
+		for k in range(len(xs)):
+			x = xs[k]
+			while parent[x] != x:
+				parent[x] = parent[parent[x]]
+				x = parent[x]
+			y = ys[k]
+			while parent[y] != y:
+				parent[y] = parent[parent[y]]
+				y = parent[y]
+			if x != y:
+				if rank[x] > rank[y]:
+					x, y = y, x
+				parent[x] = y
+				size[y] += size[x]
+				if rank[x] == rank[y]:
+					rank[y] += 1
+				self.count -= 1
+				united.append(k)
+				if self.count == stop_at_count:
+					break
+		return united
+
+	def find_many(self, xs):
+		"""Return a list of the roots of the sets containing each element of xs."""
+		return [self.find(x) for x in xs]
+
+	def get_count(self):
+		"""Return the number of disjoint sets."""
+		return self.count
+
+	def get_set_size(self, x):
+		"""Return the number of elements in the set containing x."""
+		return self.size[self.find(x)]
+
+	def labels(self):
+		"""Return a list giving, for every element, the root of its set."""
+		return [self.find(x) for x in range(len(self.parent))]
+
+
 def print_find_path(x):
 	"""Print the find path starting from node x to the root."""
 	while x != x.parent:
@@ -119,3 +217,17 @@ if __name__ == "__main__":
 	union(sets[0], sets[4])
 	for s in sets:
 		print_find_path(s)
+
+	# A find path far longer than the recursion limit.
+	chain = [make_set(i) for i in range(100000)]
+	for i in range(len(chain) - 1):
+		chain[i].parent = chain[i + 1]
+	print(find_set(chain[0]), chain[0].parent)
+
+	# Array version.
+	forest = DisjointSetArray(8)
+	print(forest.union_many([0, 2, 4, 6, 0, 4, 1], [1, 3, 5, 7, 2, 6, 3]))
+	print(forest.get_count(), forest.same_set(1, 2), forest.same_set(3, 4), forest.get_set_size(0))
+	print(forest.find_many(range(8)), forest.labels())
+	forest.union(3, 7)
+	print(forest.get_count(), forest.same_set(0, 7))
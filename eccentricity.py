@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# eccentricity.py
+
+import numpy as np
+from csr_graph import csr_snapshot
+from dijkstra import dijkstra_csr
+
+
+def bounding_eccentricities(G, goal='all', unit_weights=False):
+	"""Compute eccentricities, the diameter, or the radius of a strongly connected graph
+	exactly with the bounding method of Takes and Kosters, which usually needs far
+	fewer shortest-path searches than there are vertices.
+
+	Every vertex keeps a lower and an upper bound on its eccentricity.  A search from
+	v gives its eccentricity e, and for every vertex w the triangle inequality gives
+	max(d(w, v), e - d(v, w)) <= ecc(w) <= d(w, v) + e.  Vertices are searched from
+	alternately with the largest upper bound and the smallest lower bound, and a
+	vertex stops being a candidate once its bounds meet or, for the diameter or the
+	radius, once it can no longer attain the extreme value.  In a directed graph each
+	step searches forward and backward from v.
+
+	Arguments:
+	G -- a graph implemented with adjacency lists, or a CSRGraph snapshot of one, with
+	nonnegative weights
+	goal -- 'all' for every eccentricity, 'diameter', or 'radius'
+	unit_weights -- whether to count edges instead of using weights
+	Returns:
+	lower -- NumPy array of lower bounds on the eccentricities; exact for 'all'
+	upper -- NumPy array of upper bounds on the eccentricities; exact for 'all'
+	searches -- number of single-source shortest-path searches run
+	"""
+	if goal not in ('all', 'diameter', 'radius'):
+		raise RuntimeError("Goal should be 'all', 'diameter', or 'radius'.")
+	C = csr_snapshot(G, unit_weights)
+	R = C.transpose() if C.is_directed() else C
+	card_V = C.get_card_V()
+	degree = np.diff(np.array(C.offsets))
+	lower = np.zeros(card_V)
+	upper = np.full(card_V, float('inf'))
+	candidate = np.ones(card_V, dtype=bool)
+	searches = 0
+	largest = True
+
+	while candidate.any():
+		# Choose the candidate with the largest upper or smallest lower bound, breaking ties by degree.
+		bound = np.where(candidate, upper if largest else -lower, -np.inf)
+		ties = np.flatnonzero(bound == bound.max())
+		v = ties[np.argmax(degree[ties])]
+		largest = not largest
+
+		forward = np.array(dijkstra_csr(C, v)[0])
+		backward = np.array(dijkstra_csr(R, v)[0]) if C.is_directed() else forward
+		searches += 2 if C.is_directed() else 1
+		e = forward.max()
+		if e == float('inf') or backward.max() == float('inf'):
+			raise RuntimeError("Graph should be strongly connected.")
+		lower = np.maximum(lower, np.maximum(backward, e - forward))
+		upper = np.minimum(upper, backward + e)
+		lower[v] = upper[v] = e
+
+		candidate &= lower < upper
+		if goal == 'diameter':
+			candidate &= upper > lower.max()
+		elif goal == 'radius':
+			candidate &= lower < upper.min()
+
+	return lower, upper, searches
+
+
+def eccentricities(G, unit_weights=False):
+	"""Return a NumPy array of the eccentricity of every vertex of a strongly connected
+	graph, and the number of searches run, by bounding_eccentricities."""
+	lower, _, searches = bounding_eccentricities(G, 'all', unit_weights)
+	return lower, searches
+
+
+def diameter(G, unit_weights=False):
+	"""Return the diameter of a strongly connected graph, and the number of searches run."""
+	lower, _, searches = bounding_eccentricities(G, 'diameter', unit_weights)
+	return lower.max(), searches
+
+
+def radius(G, unit_weights=False):
+	"""Return the radius of a strongly connected graph, and the number of searches run."""
+	_, upper, searches = bounding_eccentricities(G, 'radius', unit_weights)
+	return upper.min(), searches
+
+
+# Testing
+if __name__ == "__main__":
+
+	from random import Random
+	from adjacency_list_graph import AdjacencyListGraph
+	from all_pairs_shortest_paths import all_pairs_distances
+	from csr_graph import CSRGraph
+	from london_underground import load_london_underground
+
+	def random_connected_graph(card_V, extra, directed, rng):
+		"""A random tree with extra random edges, with edges in both directions if directed."""
+		G = AdjacencyListGraph(card_V, directed, True)
+		edges = [(rng.randrange(v), v) for v in range(1, card_V)]
+		edges += [tuple(rng.sample(range(card_V), 2)) for _ in range(extra)]
+		for u, v in edges:
+			for x, y in ((u, v), (v, u)) if directed else ((u, v),):
+				if not G.has_edge(x, y):
+					G.insert_edge(x, y, rng.randint(1, 10))
+		return G
+
+	# Compare with all-pairs distances.
+	rng = Random(1)
+	all_equal = True
+	for trial in range(20):
+		graph1 = random_connected_graph(40, rng.randint(0, 60), trial % 2 == 0, rng)
+		for unit_weights in (False, True):
+			ecc = all_pairs_distances(CSRGraph(graph1, unit_weights)).max(axis=1)
+			if not (np.array_equal(eccentricities(graph1, unit_weights)[0], ecc)
+					and diameter(graph1, unit_weights)[0] == ecc.max() and radius(graph1, unit_weights)[0] == ecc.min()):
+				print("Mismatch in trial", trial)
+				all_equal = False
+	print("All eccentricities, diameters, and radii are " + ("not " if not all_equal else "") + "equal")
+	print(diameter(CSRGraph(graph1), unit_weights=True) == diameter(graph1, unit_weights=True))
+
+	# Benchmark: searches against the number of vertices.
+	graph2, stations2 = load_london_underground()
+	graph3, _ = load_london_underground(directed=False)
+	print(f"{'graph':>30} {'V':>6} {'diameter':>9} {'searches':>9} {'radius':>7} {'searches':>9} {'all ecc. searches':>18}")
+	cases = [("tube, minutes", graph3, False), ("tube, stops", graph3, True),
+			 ("tube directed, minutes", graph2, False), ("tube directed, stops", graph2, True)]
+	# Sparse random networks, nearly trees as transport networks are.
+	for card_V in (1000, 4000):
+		cases.append(("random, " + str(card_V) + " vertices", random_connected_graph(card_V, card_V // 20, False, rng), False))
+	for name, graph, unit_weights in cases:
+		d, diameter_searches = diameter(graph, unit_weights)
+		r, radius_searches = radius(graph, unit_weights)
+		all_searches = eccentricities(graph, unit_weights)[1]
+		print(f"{name:>30} {graph.get_card_V():>6} {d:>9.0f} {diameter_searches:>9} {r:>7.0f} {radius_searches:>9} "
+			  f"{all_searches:>18}")
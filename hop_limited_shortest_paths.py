@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# hop_limited_shortest_paths.py
+
+import numpy as np
+from csr_graph import CSRGraph
+
+
+def hop_limited_shortest_paths(G, s, k):
+	"""Find, for every hop budget h = 0, 1, ..., k, the shortest paths from s that
+	use at most h edges.
+
+	This is Bellman-Ford run level-synchronously: row h is row h - 1 with every
+	edge relaxed once against the distances of row h - 1, so that a relaxation can
+	extend a path by only one edge per level.  As in relax, a distance changes only
+	on a strict improvement.  Each level is one vectorized pass over the edges, for
+	O(k E) time in all, and levels stop being computed once they no longer change.
+
+	Arguments:
+	G -- a weighted graph, implemented with adjacency lists, or a CSRGraph snapshot
+	s -- index of source vertex
+	k -- maximum number of edges (stops) on a path
+	Returns:
+	d -- a (k + 1) x |V| array; d[h, v] is the shortest distance from s to v using at
+	most h edges, or inf if there is no such path
+	pi -- a (k + 1) x |V| array of predecessors for the paths of d, -1 for none
+	"""
+	if k < 0:
+		raise RuntimeError("Hop limit should be nonnegative.")
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	card_V = C.get_card_V()
+	offsets = np.asarray(C.offsets)
+	heads = np.asarray(C.heads, dtype=np.intp)
+	tails = np.repeat(np.arange(card_V), np.diff(offsets))
+	weights = np.asarray(C.weights, dtype=float)
+
+	# Group the edges by head so that each level can take per-vertex minima with reduceat.
+	order = np.argsort(heads, kind='stable')
+	heads, tails, weights = heads[order], tails[order], weights[order]
+	has_in_edges = np.flatnonzero(np.bincount(heads, minlength=card_V))
+	starts = np.searchsorted(heads, has_in_edges)
+
+	d = np.full((k + 1, card_V), np.inf)
+	pi = np.full((k + 1, card_V), -1, dtype=np.intp)
+	d[0, s] = 0
+	for h in range(1, k + 1):
+		prev = d[h - 1]
+		candidates = prev[tails] + weights
+		d[h] = prev
+		pi[h] = pi[h - 1]
+		if len(heads) > 0:
+			best = np.minimum.reduceat(candidates, starts)
+			improved = best < prev[has_in_edges]
+			d[h, has_in_edges[improved]] = best[improved]
+			# Record one edge attaining each improved minimum as the predecessor.
+			attains = (candidates == d[h, heads]) & (candidates < prev[heads])
+			pi[h, heads[attains]] = tails[attains]
+		if np.array_equal(d[h], prev):
+			d[h + 1:] = d[h]
+			pi[h + 1:] = pi[h]
+			break
+
+	return d, pi
+
+
+def hop_limited_path(pi, s, v, h):
+	"""Return the list of vertices on the path of at most h edges from s to v given by
+	the predecessor table of hop_limited_shortest_paths, or None if there is no such path."""
+	path = [v]
+	while v != s:
+		if h == 0 or pi[h, v] < 0:
+			return None
+		v = int(pi[h, v])
+		h -= 1
+		path.append(v)
+	path.reverse()
+	return path
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from itertools import product
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	def brute_force_table(G, s, k):
+		"""Return the hop-limited distance table by extending every walk one edge at a time."""
+		card_V = G.get_card_V()
+		table = [[float('inf')] * card_V for _ in range(k + 1)]
+		table[0][s] = 0
+		for h in range(1, k + 1):
+			table[h] = table[h - 1][:]
+			for u in range(card_V):
+				for edge in G.get_adj_list(u):
+					table[h][edge.get_v()] = min(table[h][edge.get_v()], table[h - 1][u] + edge.get_weight())
+		return table
+
+	all_equal = True
+	for trial in range(20):
+		graph1 = generate_random_graph(12, 0.2, True, trial % 2 == 0, True, 0, 10)
+		d, pi = hop_limited_shortest_paths(graph1, 0, 6)
+		if d.tolist() != brute_force_table(graph1, 0, 6):
+			print("Mismatch in trial", trial)
+			all_equal = False
+		for h, v in product(range(7), range(12)):
+			path = hop_limited_path(pi, 0, v, h)
+			if (path is None) != (d[h, v] == np.inf) or (path is not None and len(path) - 1 > h):
+				print("Bad path in trial", trial)
+				all_equal = False
+	print("All hop-limited distances are " + ("not " if not all_equal else "") + "equal")
+
+	# Fastest tube journeys from Upminster to Ealing Broadway with at most k stops.
+	graph2, stations2 = load_london_underground()
+	s, t = stations2['Upminster'], stations2['Ealing Broadway']
+	start = time.perf_counter()
+	d, pi = hop_limited_shortest_paths(graph2, s, 40)
+	elapsed = time.perf_counter() - start
+	for h in range(30, 41, 2):
+		print(h, "stops:", d[h, t])
+	print(f"{d.shape} table in {elapsed * 1e3:.2f} ms")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# isochrone.py
+
+from bisect import bisect_right
+from heapq import heappush, heappop
+import numpy as np
+from csr_graph import CSRGraph
+
+
+class BudgetedSearch:
+
+	def __init__(self, G, s, edge_mask=None):
+		"""Initialize a resumable Dijkstra search from s that settles vertices only up to
+		a travel-time budget.  Raising the budget later resumes the search where it
+		stopped, rather than starting over.
+
+		Arguments:
+		G -- a graph with nonnegative weights, implemented with adjacency lists, or a
+		CSRGraph snapshot of one
+		s -- index of source vertex
+		edge_mask -- optional mask indexed by edge id; edges with a nonzero entry are skipped
+		"""
+		C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+		self.C = C
+		self.edge_mask = edge_mask
+		self.d = [float('inf')] * C.get_card_V()
+		self.d[s] = 0
+		self.settled = bytearray(C.get_card_V())
+		self.order = []  # settled vertices, in nondecreasing order of distance
+		self.times = []  # distances of the vertices in order
+		self.queue = [(0, s)]
+		self.budget = -1
+
+	def advance(self, budget):
+		"""Settle every vertex within the budget, stopping as soon as the next
+		vertex in the queue is farther than the budget."""
+		if budget <= self.budget:
+			return
+		self.budget = budget
+		offsets, heads, weights, edge_ids = self.C.offsets, self.C.heads, self.C.weights, self.C.edge_ids
+		edge_mask, d, settled, queue = self.edge_mask, self.d, self.settled, self.queue
+		while queue and queue[0][0] <= budget:
+			du, u = heappop(queue)
+			if settled[u]:  # stale entry
+				continue
+			settled[u] = 1
+			self.order.append(u)
+			self.times.append(du)
+			for i in range(offsets[u], offsets[u + 1]):
+				if edge_mask is not None and edge_mask[edge_ids[i]]:
+					continue
+				v = heads[i]
+				dv = du + weights[i]
+				if dv < d[v]:
+					d[v] = dv
+					heappush(queue, (dv, v))
+
+	def reachable(self, budget):
+		"""Return the vertices reachable within the budget and their travel times,
+		as two NumPy arrays in nondecreasing order of time."""
+		self.advance(budget)
+		n = bisect_right(self.times, budget)
+		return np.array(self.order[:n], dtype=np.intp), np.array(self.times[:n], dtype=float)
+
+
+def isochrone(G, s, budget, edge_mask=None):
+	"""Return the vertices reachable from s within the budget and their travel times,
+	as two NumPy arrays in nondecreasing order of time.  G may be a graph implemented
+	with adjacency lists or a CSRGraph snapshot of one."""
+	return BudgetedSearch(G, s, edge_mask).reachable(budget)
+
+
+def isochrones(G, origins, budgets, counts_only=False, edge_mask=None):
+	"""Compute isochrones for many origins and budgets, with one resumable search per
+	origin that is advanced through the budgets in increasing order.
+
+	Arguments:
+	G -- a graph with nonnegative weights, implemented with adjacency lists, or a
+	CSRGraph snapshot of one
+	origins -- sequence of source vertices
+	budgets -- sequence of travel-time budgets, in any order
+	counts_only -- if True, return only the counts of reachable vertices
+	edge_mask -- optional mask indexed by edge id; edges with a nonzero entry are skipped
+	Returns:
+	counts -- a len(origins) x len(budgets) array of the numbers of reachable vertices
+	results -- results[i][j] is the (vertices, times) pair of arrays for origins[i]
+	and budgets[j], or None if counts_only
+	"""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	counts = np.zeros((len(origins), len(budgets)), dtype=np.intp)
+	results = None if counts_only else [[None] * len(budgets) for _ in origins]
+	increasing = sorted(range(len(budgets)), key=lambda j: budgets[j])
+	for i, s in enumerate(origins):
+		search = BudgetedSearch(C, s, edge_mask)
+		for j in increasing:
+			search.advance(budgets[j])
+			if counts_only:
+				counts[i, j] = bisect_right(search.times, budgets[j])
+			else:
+				results[i][j] = search.reachable(budgets[j])
+				counts[i, j] = len(results[i][j][0])
+	return counts, results
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from dijkstra import dijkstra_csr
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	# Every isochrone should be exactly the vertices that Dijkstra places within the budget.
+	all_equal = True
+	for trial in range(10):
+		csr1 = CSRGraph(generate_random_graph(40, 0.1, True, trial % 2 == 0, True, 1, 10))
+		budgets = [12, 3, 0, 25, 7]
+		counts, results = isochrones(csr1, range(40), budgets)
+		for s in range(40):
+			d = dijkstra_csr(csr1, s)[0]
+			for j, budget in enumerate(budgets):
+				vertices, times = results[s][j]
+				expected = sorted(v for v in range(40) if d[v] <= budget)
+				if sorted(vertices.tolist()) != expected or any(d[v] != t for v, t in zip(vertices, times)):
+					all_equal = False
+	print("All isochrones are " + ("not " if not all_equal else "") + "equal")
+
+	# Stations within 10, 20, 30, 45, and 60 minutes of every station.
+	graph2, stations2 = load_london_underground()
+	csr2 = CSRGraph(graph2)
+	start = time.perf_counter()
+	counts, _ = isochrones(csr2, range(csr2.get_card_V()), [10, 20, 30, 45, 60], counts_only=True)
+	elapsed = time.perf_counter() - start
+	print(counts[stations2['Bank']], counts.mean(axis=0))
+	print(np.array_equal(isochrone(graph2, stations2['Bank'], 20)[0], isochrone(csr2, stations2['Bank'], 20)[0]))
+	print(f"{counts.size} isochrones in {elapsed * 1e3:.1f} ms")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# journey_cli.py
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from batch_queries import stream_station_queries
+from csr_graph import CSRGraph
+from dijkstra import dijkstra_csr
+from london_underground import load_london_underground
+from route_cache import ShortestPathTreeCache
+
+
+def read_csv_queries(file, header=False):
+	"""Yield (start, end) station names from the first two columns of CSV lines, or
+	(None, None) for a line with fewer than two columns.  Blank lines are skipped."""
+	reader = csv.reader(file)
+	if header:
+		next(reader, None)
+	for row in reader:
+		if not row:
+			continue
+		yield (row[0], row[1]) if len(row) >= 2 else (None, None)
+
+
+def read_jsonl_queries(file):
+	"""Yield (start, end) station names from JSON lines, each an object with "from" and
+	"to" strings or a list of two strings, or (None, None) for a malformed line.  Blank
+	lines are skipped."""
+	for line in file:
+		if not line.strip():
+			continue
+		try:
+			query = json.loads(line)
+		except ValueError:
+			yield None, None
+			continue
+		if isinstance(query, dict):
+			query = (query.get("from"), query.get("to"))
+		if isinstance(query, (list, tuple)) and len(query) == 2 and all(isinstance(name, str) for name in query):
+			yield query[0], query[1]
+		else:
+			yield None, None
+
+
+def format_result(start, end, distance, path, unit):
+	"""Return the JSON line answering one query."""
+	if start is None:
+		result = {"error": "malformed query"}
+	elif distance is None:
+		result = {"from": start, "to": end, "error": "unknown station"}
+	else:
+		result = {"from": start, "to": end, unit: distance if distance != float('inf') else None}
+		if path is not None:
+			result["path"] = path
+	return json.dumps(result)
+
+
+def answer_queries(C, stations, pairs, output, unit='minutes', with_paths=False, chunk_size=10000, cache=None):
+	"""Answer a stream of station-name queries, writing one JSON line per query, in
+	input order, to output.  Queries are answered chunk_size at a time, with one
+	search per distinct origin in each chunk, and each chunk's lines are written
+	together, so at most one chunk of queries and results is held at a time.
+
+	Arguments:
+	C -- a CSRGraph of the network
+	stations -- dictionary mapping station names to vertex indices
+	pairs -- iterable of (start, end) station names, or (None, None) for malformed queries
+	output -- text file to write to
+	unit -- key of the distance in each line, such as "minutes" or "stops"
+	with_paths -- whether to include the paths
+	chunk_size -- number of queries answered together
+	cache -- optional ShortestPathTreeCache, to reuse trees across chunks
+	Returns:
+	The number of queries answered
+	"""
+	count = 0
+	lines = []
+	for start, end, distance, path in stream_station_queries(C, stations, pairs, with_paths, chunk_size, cache):
+		lines.append(format_result(start, end, distance, path, unit))
+		if len(lines) == chunk_size:
+			output.write('\n'.join(lines) + '\n')
+			count += len(lines)
+			lines = []
+	if lines:
+		output.write('\n'.join(lines) + '\n')
+		count += len(lines)
+	output.flush()
+	return count
+
+
+def main(argv=None):
+	"""Answer station-pair queries from a file or standard input, writing JSON lines,
+	or run the self-test.  Returns the exit status: 0, or 1 if the reader of the
+	output stopped early."""
+	parser = argparse.ArgumentParser(description="Answer journey queries in bulk, writing one JSON line per query.")
+	parser.add_argument('input', nargs='?', default='-', help="CSV or JSONL file of station pairs; - for standard input")
+	parser.add_argument('-o', '--output', default='-', help="file to write JSON lines to; - for standard output")
+	parser.add_argument('-f', '--format', choices=('csv', 'jsonl'),
+						help="input format; by default from the file extension, or csv for standard input")
+	parser.add_argument('--header', action='store_true', help="skip the first line of CSV input")
+	parser.add_argument('--stops', action='store_true', help="minimize stops rather than minutes")
+	parser.add_argument('--paths', action='store_true', help="include the path of each journey")
+	parser.add_argument('--chunk-size', type=int, default=10000, help="queries answered together (default 10000)")
+	parser.add_argument('--cache', type=int, default=0, metavar='N',
+						help="keep up to N shortest-path trees across chunks (default 0, none)")
+	parser.add_argument('--network', default='london_underground_graph.csv', help="CSV file of the network")
+	parser.add_argument('--self-test', action='store_true', help="run the self-test instead of answering queries")
+	args = parser.parse_args(argv)
+	if args.self_test:
+		_test()
+		return 0
+	if args.chunk_size < 1:
+		parser.error("--chunk-size must be at least 1")
+
+	graph, stations = load_london_underground(args.network)
+	C = CSRGraph(graph, unit_weights=args.stops)
+	cache = ShortestPathTreeCache(graph, args.cache, lambda G, s: dijkstra_csr(C, s)) if args.cache > 0 else None
+	input_format = args.format
+	if input_format is None:
+		input_format = 'jsonl' if os.path.splitext(args.input)[1].lower() in ('.jsonl', '.json') else 'csv'
+
+	input_file = sys.stdin if args.input == '-' else open(args.input, newline='')
+	output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+	try:
+		pairs = read_jsonl_queries(input_file) if input_format == 'jsonl' else read_csv_queries(input_file, args.header)
+		answer_queries(C, stations, pairs, output_file, 'stops' if args.stops else 'minutes', args.paths,
+					   args.chunk_size, cache)
+	except BrokenPipeError:  # the reader, such as head, stopped early
+		# Point standard output at devnull, so that flushing it at exit does not fail again.
+		devnull = os.open(os.devnull, os.O_WRONLY)
+		os.dup2(devnull, output_file.fileno())
+		return 1
+	finally:
+		if input_file is not sys.stdin:
+			input_file.close()
+		if output_file is not sys.stdout:
+			output_file.close()
+	return 0
+
+
+def _test():
+	import time
+	from random import Random
+	from batch_queries import batch_station_queries
+
+	graph1, stations1 = load_london_underground()
+	names = list(stations1)
+	csr1 = CSRGraph(graph1)
+	rng = Random(1)
+	pairs = [(rng.choice(names), rng.choice(names)) for _ in range(50000)]
+	expected = batch_station_queries(csr1, stations1, pairs)[0]
+
+	# CSV in, JSON lines out, with and without a cache, in small chunks to bound buffering.
+	text = io.StringIO()
+	csv.writer(text).writerows([('Station A', 'Station B')] + pairs)
+	for cache in (None, ShortestPathTreeCache(graph1, 512, lambda G, s: dijkstra_csr(csr1, s))):
+		output = io.StringIO()
+		start = time.perf_counter()
+		count = answer_queries(csr1, stations1, read_csv_queries(io.StringIO(text.getvalue()), header=True), output,
+							   chunk_size=5000, cache=cache)
+		elapsed = time.perf_counter() - start
+		results = [json.loads(line) for line in output.getvalue().splitlines()]
+		print(count == len(pairs), [result["minutes"] for result in results] == expected,
+			  f"{count / elapsed:.0f} queries per second" + (" with a cache" if cache else ""))
+
+	# JSON lines in, with malformed lines and unknown stations.
+	lines = ['{"from": "Bank", "to": "Baker Street"}', '["Bank", "Angel"]', 'not json', '{"from": "Bank"}',
+			 '', '{"from": "Bank", "to": "Atlantis"}']
+	output = io.StringIO()
+	answer_queries(csr1, stations1, read_jsonl_queries(io.StringIO('\n'.join(lines))), output, with_paths=True)
+	print(output.getvalue(), end='')
+
+
+if __name__ == "__main__":
+	sys.exit(main())
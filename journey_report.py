@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# journey_report.py
+
+import csv
+import json
+import os
+import numpy as np
+
+
+def histogram_from_values(values, edges=None, bin_width=1):
+	"""Count journey times into bins, skipping unreachable (inf) entries.
+
+	Arguments:
+	values -- array-like of journey times
+	edges -- optional bin edges; by default, bins of width bin_width from 0 past the
+	largest value, counted with np.bincount rather than by searching the edges
+	bin_width -- width of the default bins
+	Returns:
+	edges -- NumPy array of the bin edges, one more than the bins
+	counts -- NumPy array of the number of values in each bin
+	"""
+	values = np.asarray(values, dtype=float).ravel()
+	values = values[np.isfinite(values)]
+	if edges is not None:
+		edges = np.asarray(edges, dtype=float)
+		return edges, np.histogram(values, edges)[0]
+	if values.size and values.min() < 0:
+		raise RuntimeError("Journey times should be nonnegative.")
+	counts = np.bincount((values // bin_width).astype(np.int64))
+	return np.arange(len(counts) + 1) * float(bin_width), counts
+
+
+def histogram_from_matrix(D, edges=None, bin_width=1):
+	"""Count the journey times of an all-pairs distance matrix, skipping the diagonal
+	and unreachable pairs, as histogram_from_values does."""
+	D = np.asarray(D, dtype=float)
+	return histogram_from_values(D[~np.eye(*D.shape, dtype=bool)], edges, bin_width)
+
+
+def write_histogram_csv(path, edges, series):
+	"""Write histograms with common bin edges to a CSV file, one row per bin.
+
+	Arguments:
+	path -- name of the file
+	edges -- bin edges
+	series -- dictionary mapping a column name to the counts of each bin
+	"""
+	with open(path, 'w', newline='') as file:
+		writer = csv.writer(file)
+		writer.writerow(['bin_start', 'bin_end'] + list(series))
+		for k in range(len(edges) - 1):
+			writer.writerow([float(edges[k]), float(edges[k + 1])] + [int(counts[k]) for counts in series.values()])
+
+
+def write_histogram_json(path, edges, series, **metadata):
+	"""Write histograms with common bin edges to a JSON file, along with any metadata
+	given as keyword arguments."""
+	document = dict(metadata)
+	document["edges"] = [float(edge) for edge in edges]
+	document["counts"] = {name: [int(count) for count in counts] for name, counts in series.items()}
+	with open(path, 'w') as file:
+		json.dump(document, file, indent=1)
+
+
+def render_histograms(path, edges, series, titles=None, xlabel='', ylabel='', density=False, colors=None,
+					  figsize=None):
+	"""Render histograms with common bin edges side by side to a PNG or SVG file.
+
+	The figure is drawn off-screen with the Agg canvas, without pyplot, so no display
+	or interactive backend is needed.
+
+	Arguments:
+	path -- name of the file; its extension, .png or .svg, gives the format
+	edges -- bin edges
+	series -- dictionary mapping a legend label to the counts of each bin
+	titles -- optional list of panel titles, one per series
+	xlabel, ylabel -- axis labels
+	density -- whether to normalize each histogram to unit area
+	colors -- optional list of bar colors, one per series
+	figsize -- optional (width, height) of the figure in inches
+	"""
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+	edges = np.asarray(edges, dtype=float)
+	figure = Figure(figsize=figsize or (8 * len(series), 6))
+	FigureCanvasAgg(figure)
+	for k, (label, counts) in enumerate(series.items()):
+		axes = figure.add_subplot(1, len(series), k + 1)
+		heights = np.asarray(counts, dtype=float)
+		if density and heights.sum():
+			heights = heights / (heights.sum() * np.diff(edges))
+		axes.stairs(heights, edges, fill=True, alpha=0.75, label=label, edgecolor='black',
+					color=colors[k] if colors else None)
+		if titles:
+			axes.set_title(titles[k])
+		axes.set_xlabel(xlabel)
+		axes.set_ylabel(ylabel)
+		if len(series) > 1:
+			axes.legend()
+	figure.tight_layout()
+	figure.savefig(path)
+
+
+def export_histograms(paths, edges, series, **options):
+	"""Write histograms to every file in paths, choosing the format by extension:
+	.csv and .json files get the counts, and .png and .svg files the rendered figure.
+
+	Arguments:
+	paths -- iterable of file names
+	edges -- bin edges
+	series -- dictionary mapping a name to the counts of each bin
+	options -- keyword arguments for render_histograms
+	"""
+	for path in paths:
+		extension = os.path.splitext(path)[1].lower()
+		if extension == '.csv':
+			write_histogram_csv(path, edges, series)
+		elif extension == '.json':
+			write_histogram_json(path, edges, series)
+		elif extension in ('.png', '.svg'):
+			render_histograms(path, edges, series, **options)
+		else:
+			raise RuntimeError("Unknown output format " + path + ".")
+
+
+# Testing
+if __name__ == "__main__":
+
+	import tempfile
+	import time
+	from all_pairs_shortest_paths import all_pairs_distances
+	from csr_graph import CSRGraph
+	from london_underground import load_london_underground
+
+	graph1, stations1 = load_london_underground()
+	D = all_pairs_distances(CSRGraph(graph1))
+	values = [D[s, v] for s in range(len(D)) for v in range(len(D)) if s != v]
+
+	# The default bins match np.histogram over the raw values.
+	start = time.perf_counter()
+	edges, counts = histogram_from_matrix(D)
+	print(f"Binned in {(time.perf_counter() - start) * 1e3:.2f} ms")
+	print(np.array_equal(counts, np.histogram(values, edges)[0]), int(counts.sum()) == len(values))
+	edges5, counts5 = histogram_from_matrix(D, edges=range(0, int(D.max()) + 5, 5))
+	print(np.array_equal(counts5, np.add.reduceat(counts, range(0, len(counts), 5))))
+
+	with tempfile.TemporaryDirectory() as directory:
+		paths = [os.path.join(directory, name) for name in ('times.csv', 'times.json', 'times.png', 'times.svg')]
+		start = time.perf_counter()
+		export_histograms(paths, edges5, {'journeys': counts5}, titles=['Journey times'],
+						  xlabel='Journey Time in Minutes', ylabel='Number of Station Pairs')
+		print(f"Exported in {time.perf_counter() - start:.2f} s:",
+			  [(os.path.basename(path), os.path.getsize(path) > 0) for path in paths])
+		with open(paths[1]) as file:
+			print(json.load(file)["counts"]["journeys"] == counts5.tolist())
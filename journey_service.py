@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# journey_service.py
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from batch_queries import trace_path
+from csr_graph import CSRGraph
+from dijkstra import dijkstra_csr
+from london_underground import load_london_underground
+from route_cache import ShortestPathTreeCache
+from single_flight import SingleFlight
+
+# Search kinds: shortest travel time, or fewest stops.
+KINDS = ('time', 'stops')
+
+
+def _snapshots(graph):
+	"""Return a CSRGraph for each search kind."""
+	return {'time': CSRGraph(graph), 'stops': CSRGraph(graph, unit_weights=True)}
+
+
+# Each worker process loads the network once when it starts.
+_worker_snapshots = None
+
+
+def _init_worker(csv_file):
+	global _worker_snapshots
+	_worker_snapshots = _snapshots(load_london_underground(csv_file)[0])
+
+
+def _search_in_worker(kind, s):
+	return dijkstra_csr(_worker_snapshots[kind], s)
+
+
+class HTTPError(RuntimeError):
+	"""An error to report to the client with an HTTP status code."""
+
+	def __init__(self, status, message):
+		super().__init__(message)
+		self.status = status
+
+
+class JourneyPlannerService:
+
+	def __init__(self, csv_file='london_underground_graph.csv', workers=None, cache_capacity=512):
+		"""Load the network once and answer journey queries over HTTP with JSON.
+
+		Endpoints, all GET:
+		/shortest-path?from=A&to=B -- quickest route, in minutes
+		/stops?from=A&to=B -- route with the fewest stops
+		/isochrone?from=A&minutes=M -- stations reachable within M minutes
+		/stats -- cache statistics
+
+		Searches run in a pool of worker processes, each holding its own copy of the
+		network, so that the event loop only parses requests and formats replies.  The
+		shortest-path tree of every searched origin is kept in a ShortestPathTreeCache
+		per kind in this process, so repeated origins need no search at all, and
+		concurrent misses for the same origin share one search through a SingleFlight
+		group keyed by graph version, origin, and kind.
+
+		Arguments:
+		csv_file -- the network, as load_london_underground reads it
+		workers -- number of worker processes; 0 searches in the event loop, and the
+		default is the number of CPUs
+		cache_capacity -- number of trees cached per kind
+		"""
+		self.csv_file = csv_file
+		self.graph, self.stations = load_london_underground(csv_file)
+		self.names = list(self.stations)
+		self.snapshots = _snapshots(self.graph)
+		self.caches = {kind: ShortestPathTreeCache(self.graph, cache_capacity,
+												   lambda G, s, C=self.snapshots[kind]: dijkstra_csr(C, s))
+					   for kind in KINDS}
+		self.workers = (os.cpu_count() or 1) if workers is None else workers
+		self.flights = SingleFlight()
+		self.executor = None
+		self.server = None
+		self.connections = {}  # the writer of each open connection, and the task answering it
+		self.requests = 0
+
+	async def start(self, host='127.0.0.1', port=8080):
+		"""Start the worker pool and listen for connections; port 0 picks a free port.
+		Returns the port listened on."""
+		if self.workers > 0:
+			self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.csv_file,))
+			# Start every worker now, rather than on the first requests.
+			loop = asyncio.get_running_loop()
+			await asyncio.gather(*(loop.run_in_executor(self.executor, _search_in_worker, 'time', 0)
+								   for _ in range(self.workers)))
+		self.server = await asyncio.start_server(self.handle_connection, host, port)
+		return self.server.sockets[0].getsockname()[1]
+
+	async def close(self):
+		"""Stop listening and shut down the worker pool."""
+		if self.server is not None:
+			self.server.close()
+			tasks = list(self.connections.values())
+			for writer in list(self.connections):
+				writer.close()
+			await asyncio.gather(*tasks, return_exceptions=True)
+			await self.server.wait_closed()
+		if self.executor is not None:
+			self.executor.shutdown()
+
+	async def tree(self, kind, s):
+		"""Return d and pi for a search of the given kind from s, from the cache if possible.
+		The lists are shared with the cache and with other requests, and must not be modified."""
+		tree = self.caches[kind].lookup(s)
+		if tree is not None:
+			return tree
+		version = self.graph.get_version()
+		return await self.flights.run((version, s, kind), self.search, kind, s, version)
+
+	async def search(self, kind, s, version):
+		"""Search from s, off the event loop if there are workers, and cache the tree."""
+		if self.executor is None:
+			d, pi = dijkstra_csr(self.snapshots[kind], s)
+		else:
+			d, pi = await asyncio.get_running_loop().run_in_executor(self.executor, _search_in_worker, kind, s)
+		self.caches[kind].put(s, d, pi, version)
+		return d, pi
+
+	def station(self, query, key):
+		"""Return the vertex of the station named by a query parameter."""
+		if key not in query:
+			raise HTTPError(400, "Missing parameter '" + key + "'.")
+		name = query[key][0]
+		if name not in self.stations:
+			raise HTTPError(404, "Unknown station '" + name + "'.")
+		return self.stations[name]
+
+	async def route(self, kind, query):
+		s, t = self.station(query, 'from'), self.station(query, 'to')
+		d, pi = await self.tree(kind, s)
+		path = trace_path(pi, s, t)
+		result = {"from": self.names[s], "to": self.names[t],
+				  "path": None if path is None else [self.names[v] for v in path]}
+		if kind == 'time':
+			result["minutes"] = d[t] if path is not None else None
+		else:
+			result["stops"] = d[t] if path is not None else None
+		return result
+
+	async def isochrone(self, query):
+		s = self.station(query, 'from')
+		try:
+			budget = float(query['minutes'][0])
+		except (KeyError, ValueError):
+			raise HTTPError(400, "Parameter 'minutes' should be a number.")
+		if not math.isfinite(budget):
+			raise HTTPError(400, "Parameter 'minutes' should be finite.")
+		d, _ = await self.tree('time', s)
+		reachable = sorted((d[v], v) for v in range(len(d)) if d[v] <= budget)
+		return {"from": self.names[s], "minutes": budget,
+				"stations": [{"station": self.names[v], "minutes": dv} for dv, v in reachable]}
+
+	async def respond(self, target):
+		"""Return the status and JSON-serializable body answering a request target."""
+		url = urlsplit(target)
+		query = parse_qs(url.query)
+		if url.path == '/shortest-path':
+			return 200, await self.route('time', query)
+		if url.path == '/stops':
+			return 200, await self.route('stops', query)
+		if url.path == '/isochrone':
+			return 200, await self.isochrone(query)
+		if url.path == '/stats':
+			return 200, {"requests": self.requests, "caches": {kind: cache.get_stats() for kind, cache in self.caches.items()},
+						 "searches": self.flights.get_stats()}
+		raise HTTPError(404, "Unknown path '" + url.path + "'.")
+
+	async def handle_connection(self, reader, writer):
+		"""Answer the requests on one connection, keeping it open between requests."""
+		self.connections[writer] = asyncio.current_task()
+		try:
+			while True:
+				try:
+					request_line, headers = await self.read_head(reader)
+				except HTTPError as error:
+					# The rest of the request cannot be found reliably, so answer and close.
+					await self.write_response(writer, error.status, {"error": str(error)}, False)
+					break
+				if request_line is None:
+					break
+
+				parts = request_line.decode('latin-1').split()
+				keep_alive = len(parts) == 3 and parts[2] == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+				self.requests += 1
+				try:
+					if len(parts) != 3:
+						raise HTTPError(400, "Malformed request line.")
+					if parts[0] != 'GET':
+						raise HTTPError(405, "Only GET is supported.")
+					status, body = await self.respond(parts[1])
+				except HTTPError as error:
+					status, body = error.status, {"error": str(error)}
+				await self.write_response(writer, status, body, keep_alive)
+				if not keep_alive:
+					break
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass
+		finally:
+			self.connections.pop(writer, None)
+			writer.close()
+
+	async def read_head(self, reader):
+		"""Read a request line and its headers, and skip any body.  Returns the request
+		line and a dictionary of lower-case header names to values, or None and None at
+		the end of the connection.  Raises HTTPError for a line longer than the stream
+		limit or a malformed Content-Length."""
+		try:
+			request_line = await reader.readline()
+			if not request_line:
+				return None, None
+			headers = {}
+			while True:
+				line = await reader.readline()
+				if line in (b'\r\n', b'\n', b''):
+					break
+				name, _, value = line.decode('latin-1').partition(':')
+				headers[name.strip().lower()] = value.strip()
+		except (ValueError, asyncio.LimitOverrunError):  # readline raises ValueError past the limit
+			raise HTTPError(400, "Request line or header too long.")
+		if 'content-length' in headers:
+			try:
+				length = int(headers['content-length'])
+			except ValueError:
+				length = -1
+			if length < 0:
+				raise HTTPError(400, "Malformed Content-Length header.")
+			await reader.readexactly(length)
+		return request_line, headers
+
+	async def write_response(self, writer, status, body, keep_alive):
+		"""Write a JSON response."""
+		payload = json.dumps(body).encode()
+		writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n'
+					 % (status, _REASONS.get(status, 'Error').encode(), len(payload),
+						b'keep-alive' if keep_alive else b'close') + payload)
+		await writer.drain()
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+async def serve(host='127.0.0.1', port=8080, csv_file='london_underground_graph.csv', workers=None):
+	"""Run a JourneyPlannerService until cancelled."""
+	service = JourneyPlannerService(csv_file, workers)
+	port = await service.start(host, port)
+	print("Listening on http://" + host + ":" + str(port))
+	try:
+		await service.server.serve_forever()
+	finally:
+		await service.close()
+
+
+def main(argv=None):
+	"""Serve journey queries until interrupted, or run the self-test."""
+	parser = argparse.ArgumentParser(description="Answer journey queries over HTTP with JSON.")
+	parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default 127.0.0.1)")
+	parser.add_argument('--port', type=int, default=8080, help="port to listen on (default 8080)")
+	parser.add_argument('--workers', type=int, help="worker processes; 0 searches in the event loop (default: the number of CPUs)")
+	parser.add_argument('--network', default='london_underground_graph.csv', help="CSV file of the network")
+	parser.add_argument('--self-test', action='store_true', help="run the self-test instead of serving")
+	args = parser.parse_args(argv)
+	if args.self_test:
+		_test()
+		return 0
+	try:
+		asyncio.run(serve(args.host, args.port, args.network, args.workers))
+	except KeyboardInterrupt:
+		pass
+	return 0
+
+
+def _test():
+	import time
+	from random import Random
+	from urllib.parse import urlencode
+	from batch_queries import batch_station_queries
+
+	async def get(reader, writer, target):
+		"""Send one request on a kept-alive connection and return the status and JSON body."""
+		writer.write(b'GET ' + target.encode() + b' HTTP/1.1\r\nHost: localhost\r\n\r\n')
+		status = int((await reader.readline()).split()[1])
+		length = 0
+		while True:
+			line = await reader.readline()
+			if line == b'\r\n':
+				break
+			if line.lower().startswith(b'content-length:'):
+				length = int(line.split(b':')[1])
+		return status, json.loads(await reader.readexactly(length))
+
+	async def client(port, targets, latencies, answers):
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		for target in targets:
+			sent = time.perf_counter()
+			answers[target] = await get(reader, writer, target)
+			latencies.append(time.perf_counter() - sent)
+		writer.close()
+
+	async def run():
+		service = JourneyPlannerService(workers=1)
+		port = await service.start(port=0)
+		names = service.names
+
+		# Errors.
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		print(await get(reader, writer, '/shortest-path?from=Bank'))
+		print(await get(reader, writer, '/stops?' + urlencode({'from': 'Bank', 'to': 'Atlantis'})))
+		print((await get(reader, writer, '/isochrone?' + urlencode({'from': 'Bank', 'minutes': 5})))[1])
+		print([(await get(reader, writer, '/isochrone?' + urlencode({'from': 'Bank', 'minutes': minutes})))[0]
+			   for minutes in ('inf', '-inf', 'nan')])
+		writer.close()
+		# A malformed Content-Length, and a header longer than the stream limit, each get 400 and a closed connection.
+		for head in (b'Content-Length: ten\r\n', b'Content-Length: -1\r\n', b'X-Padding: ' + b'x' * 100000 + b'\r\n'):
+			reader, writer = await asyncio.open_connection('127.0.0.1', port)
+			writer.write(b'GET /stats HTTP/1.1\r\n' + head + b'\r\n')
+			response = await reader.read()
+			print(response.split(b'\r\n')[0].decode(), b'Connection: close' in response)
+			writer.close()
+
+		# Random queries from 20 concurrent clients, checked against batch_station_queries.
+		rng = Random(1)
+		pairs = [(rng.choice(names), rng.choice(names)) for _ in range(4000)]
+		kinds = ['/shortest-path?', '/stops?']
+		targets = [kinds[k % 2] + urlencode({'from': a, 'to': b}) for k, (a, b) in enumerate(pairs)]
+		latencies, answers = [], {}
+		start = time.perf_counter()
+		await asyncio.gather(*(client(port, targets[k::20], latencies, answers) for k in range(20)))
+		elapsed = time.perf_counter() - start
+		expected_minutes = batch_station_queries(service.snapshots['time'], service.stations, pairs[0::2])[0]
+		expected_stops = batch_station_queries(service.snapshots['stops'], service.stations, pairs[1::2])[0]
+		print(all(answers[target][1]["minutes"] == expected for target, expected in zip(targets[0::2], expected_minutes))
+			  and all(answers[target][1]["stops"] == expected for target, expected in zip(targets[1::2], expected_stops)))
+		print(f"Saturated: {len(targets)} requests in {elapsed:.2f} s ({len(targets) / elapsed:.0f} per second)")
+
+		# A rush-hour burst: 200 concurrent requests from one origin, with a cold cache, share one search.
+		for kind in KINDS:
+			service.caches[kind].invalidate()
+		calls = service.flights.get_stats()["calls"]
+		lookups = service.caches['time'].hits + service.caches['time'].misses
+		burst = ['/shortest-path?' + urlencode({'from': 'Bank', 'to': name}) for name in names[:200]]
+		latencies, answers = [], {}
+		await asyncio.gather(*(client(port, [target], latencies, answers) for target in burst))
+		print("Burst of", len(burst), "requests ran", service.flights.get_stats()["calls"] - calls, "search(es)")
+		# Every request counts as one hit or miss, including those that waited for another's search.
+		print(service.caches['time'].hits + service.caches['time'].misses - lookups == len(burst))
+
+		# Latency at a steady 500 requests per second over 20 connections, including a cold cache.
+		for kind in KINDS:
+			service.caches[kind].invalidate()
+		latencies = []
+		rate = 500
+		start = time.perf_counter()
+
+		async def paced_client(k):
+			reader, writer = await asyncio.open_connection('127.0.0.1', port)
+			for n in range(k, 2000, 20):
+				await asyncio.sleep(max(0.0, start + n / rate - time.perf_counter()))
+				sent = time.perf_counter()
+				await get(reader, writer, targets[n])
+				latencies.append(time.perf_counter() - sent)
+			writer.close()
+
+		await asyncio.gather(*(paced_client(k) for k in range(20)))
+		latencies.sort()
+		print(f"At {rate} per second: p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, "
+			  f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms")
+
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		print((await get(reader, writer, '/stats'))[1])
+		writer.close()
+		await service.close()
+
+	asyncio.run(run())
+
+
+if __name__ == "__main__":
+	sys.exit(main())
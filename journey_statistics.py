@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# journey_statistics.py
+
+import numpy as np
+
+
+class StreamingHistogram:
+
+	def __init__(self, bin_width=1):
+		"""Initialize an empty histogram of journey times that is fed one row of distances
+		at a time, so that all-pairs statistics need only O(V) memory beyond the bins.
+
+		Values fall into bins [k * bin_width, (k + 1) * bin_width).  The count, mean,
+		minimum, and maximum are exact; quantiles are interpolated within a bin, so they
+		are exact to within bin_width.
+
+		Arguments:
+		bin_width -- width of the bins
+		"""
+		self.bin_width = bin_width
+		self.counts = np.zeros(0, dtype=np.int64)
+		self.count = 0
+		self.total = 0.0
+		self.min = float('inf')
+		self.max = float('-inf')
+		self.unreachable = 0
+
+	def add_row(self, s, d):
+		"""Add the distances d from source s, skipping d[s] and unreachable (inf) entries."""
+		d = np.asarray(d, dtype=float)
+		keep = np.isfinite(d)
+		self.unreachable += len(d) - int(keep.sum())
+		if 0 <= s < len(d):
+			keep[s] = False
+		values = d[keep]
+		if values.size == 0:
+			return
+		if values.min() < 0:
+			raise RuntimeError("Journey times should be nonnegative.")
+		bins = np.bincount((values // self.bin_width).astype(np.int64))
+		if len(bins) > len(self.counts):
+			bins[:len(self.counts)] += self.counts
+			self.counts = bins
+		else:
+			self.counts[:len(bins)] += bins
+		self.count += values.size
+		self.total += float(values.sum())
+		self.min = min(self.min, float(values.min()))
+		self.max = max(self.max, float(values.max()))
+
+	def add_rows(self, rows):
+		"""Add every (s, d) row from an iterable, such as iter_distance_rows, and return self."""
+		for s, d in rows:
+			self.add_row(s, d)
+		return self
+
+	def get_count(self):
+		"""Return the number of pairs added."""
+		return self.count
+
+	def get_unreachable(self):
+		"""Return the number of pairs skipped as unreachable."""
+		return self.unreachable
+
+	def get_mean(self):
+		"""Return the mean journey time, or None if nothing was added."""
+		return self.total / self.count if self.count else None
+
+	def get_min(self):
+		"""Return the shortest journey time, or None if nothing was added."""
+		return self.min if self.count else None
+
+	def get_max(self):
+		"""Return the longest journey time, or None if nothing was added."""
+		return self.max if self.count else None
+
+	def quantile(self, q):
+		"""Return an approximate q-quantile, for q from 0 to 1, or None if nothing was added."""
+		return self.quantiles([q])[0]
+
+	def quantiles(self, qs):
+		"""Return a list of approximate quantiles, one for each q in qs."""
+		if not self.count:
+			return [None] * len(qs)
+		cumulative = np.cumsum(self.counts)
+		result = []
+		for q in qs:
+			if not 0 <= q <= 1:
+				raise RuntimeError("Quantiles should be between 0 and 1.")
+			rank = q * self.count
+			k = min(int(np.searchsorted(cumulative, rank)), len(cumulative) - 1)
+			below = cumulative[k - 1] if k > 0 else 0
+			fraction = (rank - below) / self.counts[k] if self.counts[k] else 0.0
+			value = (k + fraction) * self.bin_width
+			result.append(float(min(max(value, self.min), self.max)))
+		return result
+
+	def get_bins(self):
+		"""Return the edges, one more than the bins, and the counts of the histogram's own bins."""
+		edges = np.arange(len(self.counts) + 1) * self.bin_width
+		return edges, self.counts.copy()
+
+	def histogram(self, edges):
+		"""Return the counts in the bins between consecutive edges, as np.histogram would.
+
+		Each of the histogram's own bins is placed by its lower edge, so the counts are
+		exact when every value is a multiple of bin_width, as whole-minute journey
+		times are with the default width.
+		"""
+		edges = np.asarray(edges, dtype=float)
+		lower = np.arange(len(self.counts)) * self.bin_width
+		k = np.searchsorted(edges, lower, side='right') - 1
+		k[lower == edges[-1]] = len(edges) - 2  # the last bin includes its right edge
+		inside = (k >= 0) & (k < len(edges) - 1)
+		return np.bincount(k[inside], weights=self.counts[inside], minlength=len(edges) - 1).astype(np.int64)
+
+
+def journey_time_histogram(rows, bin_width=1):
+	"""Return a StreamingHistogram of the distances in an iterable of (s, d) rows."""
+	return StreamingHistogram(bin_width).add_rows(rows)
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	import tracemalloc
+	from all_pairs_shortest_paths import all_pairs_distances, iter_distance_rows
+	from csr_graph import CSRGraph
+	from london_underground import load_london_underground
+
+	graph1, stations1 = load_london_underground()
+	csr1 = CSRGraph(graph1)
+
+	# Compare with the statistics of the whole matrix.
+	D = all_pairs_distances(csr1)
+	off_diagonal = ~np.eye(len(D), dtype=bool)
+	values = D[off_diagonal & np.isfinite(D)]
+	tracemalloc.start()
+	start = time.perf_counter()
+	histogram = journey_time_histogram(iter_distance_rows(csr1))
+	elapsed = time.perf_counter() - start
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	print(histogram.get_count() == values.size, histogram.get_mean() == values.mean(),
+		  histogram.get_min() == values.min(), histogram.get_max() == values.max())
+	print("Quantiles:", histogram.quantiles([0.5, 0.9, 0.99]), "exact:", np.percentile(values, [50, 90, 99]).tolist())
+	edges = np.linspace(values.min(), values.max(), num=30)
+	print(np.array_equal(histogram.histogram(edges), np.histogram(values, edges)[0]))
+	edges = range(0, int(values.max()) + 1, 5)
+	print(np.array_equal(histogram.histogram(edges), np.histogram(values, edges)[0]))
+	print(f"{histogram.get_count()} pairs in {elapsed:.2f} s, peak memory {peak / 1024:.0f} KiB "
+		  f"against {D.nbytes / 1024:.0f} KiB for the matrix")
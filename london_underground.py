@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# london_underground.py
+
+import csv
+from adjacency_list_graph import AdjacencyListGraph
+
+
+def load_london_underground(csv_file='london_underground_graph.csv', directed=True, unit_weights=False):
+	"""Load the tube network from a CSV file of station pairs and travel times.
+
+	Stations are numbered in order of first appearance, so list(stations) maps
+	indices back to station names.  Uses the csv module rather than pandas so that
+	loading is cheap for short-lived processes.
+
+	Arguments:
+	csv_file -- file with columns Station A, Station B, Travel Time (minutes)
+	directed -- if False, build an undirected graph; repeated segments are inserted once
+	unit_weights -- if True, every segment has weight 1, for counting stops
+	Returns:
+	graph -- a weighted AdjacencyListGraph
+	stations -- dictionary mapping each station name to its index
+	"""
+	with open(csv_file, newline='') as file:
+		reader = csv.reader(file)
+		next(reader, None)  # skip the header line
+		# Names are kept exactly as written; a few stations differ only by a trailing space.
+		rows = [(row[0], row[1], int(row[2].strip().strip('"'))) for row in reader if row]
+
+	stations = {}
+	for station_a, station_b, _ in rows:
+		for station in (station_a, station_b):
+			if station not in stations:
+				stations[station] = len(stations)
+
+	graph = AdjacencyListGraph(len(stations), directed, True)
+	for station_a, station_b, minutes in rows:
+		u, v = stations[station_a], stations[station_b]
+		if not graph.has_edge(u, v):
+			graph.insert_edge(u, v, 1 if unit_weights else minutes)
+	return graph, stations
+
+
+# Testing
+if __name__ == "__main__":
+
+	graph1, stations1 = load_london_underground()
+	print(graph1.get_card_V(), "stations,", graph1.get_card_E(), "directed segments")
+	graph2, stations2 = load_london_underground(directed=False)
+	print(graph2.get_card_V(), "stations,", graph2.get_card_E(), "undirected segments")
+	print(list(stations1)[:5])
@@ -30,9 +30,13 @@
 #                                                                       #
 #########################################################################
 
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
 from merge_sort import merge_sort
 from adjacency_list_graph import AdjacencyListGraph
-from disjoint_set_forest import make_set, find_set, union
+from csr_graph import CSRGraph
+from disjoint_set_forest import make_set, find_set, union, DisjointSetArray
 from min_heap_priority_queue import MinHeapPriorityQueue
 
 
@@ -100,6 +104,142 @@ def kruskal(G):
     return mst
 
 
+def edge_arrays(G):
+    """Return NumPy arrays u, v, weight holding each edge of an undirected graph G once,
+    in the order that kruskal examines them before sorting."""
+    us, vs, weights = [], [], []
+    for u in range(G.get_card_V()):
+        for edge in G.get_adj_list(u):
+            if u < edge.v:  # append edge only once
+                us.append(u)
+                vs.append(edge.v)
+                weights.append(edge.get_weight())
+    return np.array(us, dtype=np.intp), np.array(vs, dtype=np.intp), np.array(weights)
+
+
+def sort_edges_by_weight(weight):
+    """Return the stable order of edges by nondecreasing weight.  Integer weights in a
+    small range are sorted by radix sort on 16-bit keys, others by a stable merge sort."""
+    if len(weight) > 0 and np.issubdtype(weight.dtype, np.integer) \
+            and int(weight.max()) - int(weight.min()) < 1 << 16:
+        return np.argsort((weight - weight.min()).astype(np.uint16), kind='stable')
+    return np.argsort(weight, kind='stable')
+
+
+def kruskal_edge_arrays(card_V, u, v, weight):
+    """Run Kruskal's algorithm on edges given as arrays.
+
+    Arguments:
+    card_V -- number of vertices
+    u, v, weight -- arrays of edge endpoints and weights, one entry per undirected edge
+    Returns:
+    An array of the indices of the edges in a minimum spanning forest, in the order chosen
+    """
+    order = sort_edges_by_weight(weight)
+    # Connect the trees of the endpoints of each edge in sorted order, stopping at a single tree.
+    forest = DisjointSetArray(card_V)
+    chosen = forest.union_many(u[order].tolist(), v[order].tolist(), stop_at_count=1)
+    return order[np.array(chosen, dtype=np.intp)]
+
+
+def kruskal_arrays(G):
+    """Return the minimum spanning tree of a weighted, undirected graph G using Kruskal's
+    algorithm on typed edge arrays rather than KruskalEdge objects.  Chooses the same
+    edges as kruskal, because both sort stably from the same edge order."""
+    if G.is_directed():
+        raise RuntimeError("Graph should be undirected.")
+    u, v, weight = edge_arrays(G)
+    mst = AdjacencyListGraph(G.get_card_V(), False, True)
+    for k in kruskal_edge_arrays(G.get_card_V(), u, v, weight).tolist():
+        mst.insert_edge(int(u[k]), int(v[k]), weight[k].item())
+    return mst
+
+
+def component_minima(card_V, cu, cv, rank):
+    """Return, for every component, the smallest rank of the edges given by endpoint
+    components cu, cv and ranks rank that leave it; the largest intp if there is none."""
+    best = np.full(card_V, np.iinfo(np.intp).max, dtype=np.intp)
+    np.minimum.at(best, cu, rank)
+    np.minimum.at(best, cv, rank)
+    return best
+
+
+def boruvka_edge_arrays(card_V, u, v, weight, processes=None):
+    """Run Boruvka's algorithm on edges given as arrays.
+
+    Each round finds the cheapest edge leaving every component in one vectorized
+    pass over the edges that cross between components, then contracts along those
+    edges by pointer jumping.  Ties are broken by position in the stable weight
+    order, as in kruskal_edge_arrays, so every edge has a distinct rank and the
+    result is the same spanning forest that Kruskal's algorithm finds.
+
+    Arguments:
+    card_V -- number of vertices
+    u, v, weight -- arrays of edge endpoints and weights, one entry per undirected edge
+    processes -- if given, split each round's minimum search across this many processes
+    Returns:
+    An array of the indices of the edges in a minimum spanning forest
+    """
+    order = sort_edges_by_weight(weight)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    none = np.iinfo(np.intp).max
+    comp = np.arange(card_V)
+    chosen = []
+    executor = ProcessPoolExecutor(processes) if processes else None
+    try:
+        live = np.arange(len(u))  # edges that may still cross between components
+        while True:
+            cu, cv = comp[u[live]], comp[v[live]]
+            crossing = cu != cv
+            live, cu, cv = live[crossing], cu[crossing], cv[crossing]
+            if len(live) == 0:
+                break
+
+            # Cheapest edge leaving each component.
+            if executor is None:
+                best = component_minima(card_V, cu, cv, rank[live])
+            else:
+                chunks = np.array_split(np.arange(len(live)), processes)
+                best = np.minimum.reduce(list(executor.map(
+                    component_minima, [card_V] * len(chunks), [cu[c] for c in chunks],
+                    [cv[c] for c in chunks], [rank[live[c]] for c in chunks])))
+
+            # Every component with an outgoing edge hooks onto the component at its other end.
+            has_edge = np.flatnonzero(best != none)
+            edges = order[best[has_edge]]
+            other = comp[u[edges]]
+            other = np.where(other == has_edge, comp[v[edges]], other)
+            parent = np.arange(card_V)
+            parent[has_edge] = other
+            # Two components that chose the same edge point at each other; the smaller one becomes the root.
+            mutual = (parent[parent] == np.arange(card_V)) & (np.arange(card_V) < parent)
+            parent[mutual] = np.flatnonzero(mutual)
+            chosen.append(np.unique(edges))
+            while True:  # pointer jumping until every component points at its root
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+            comp = parent[comp]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return np.concatenate(chosen) if chosen else np.array([], dtype=np.intp)
+
+
+def boruvka(G, processes=None):
+    """Return the minimum spanning tree of a weighted, undirected graph G using Boruvka's
+    algorithm on edge arrays, optionally with each round's minimum search split across processes."""
+    if G.is_directed():
+        raise RuntimeError("Graph should be undirected.")
+    u, v, weight = edge_arrays(G)
+    mst = AdjacencyListGraph(G.get_card_V(), False, True)
+    for k in np.sort(boruvka_edge_arrays(G.get_card_V(), u, v, weight, processes)).tolist():
+        mst.insert_edge(int(u[k]), int(v[k]), weight[k].item())
+    return mst
+
+
 def prim(G, r):
     """ Return the minimum spanning tree of a weighted, undirected graph G using Prim's algorithm.
 
@@ -140,6 +280,65 @@ def prim(G, r):
     return mst
 
 
+def prim_forest(C, r=0):
+    """Run Prim's algorithm on a CSR snapshot with a lazy binary heap.
+
+    Only vertices on the frontier are in the heap, pushed when their key drops,
+    and stale entries are skipped when popped, so no decrease_key is needed.
+    When the tree from r is finished, the search restarts from the next vertex not
+    yet reached, so a disconnected graph gives a minimum spanning forest.
+
+    Arguments:
+    C -- a CSRGraph of an undirected, weighted graph
+    r -- root vertex to start from
+    Returns:
+    pi -- predecessors in the forest, None for the root of each tree
+    key -- weight of the edge from each vertex to its predecessor, 0 for roots
+    """
+    card_V = C.get_card_V()
+    offsets, heads, weights = C.offsets, C.heads, C.weights
+    pi = [None] * card_V
+    key = [float('inf')] * card_V
+    in_tree = bytearray(card_V)
+    for root in [r] + list(range(card_V)):
+        if in_tree[root]:
+            continue
+        key[root] = 0
+        queue = [(0, root)]
+        while queue:
+            k, u = heappop(queue)
+            if in_tree[u] or k > key[u]:  # stale entry
+                continue
+            in_tree[u] = 1  # add u to the tree
+            for i in range(offsets[u], offsets[u + 1]):  # update the keys of u's non-tree neighbors
+                v = heads[i]
+                if not in_tree[v] and weights[i] < key[v]:
+                    pi[v] = u
+                    key[v] = weights[i]
+                    heappush(queue, (weights[i], v))
+    return pi, key
+
+
+def prim_lazy(G, r=0):
+    """Return the minimum spanning forest of a weighted, undirected graph G using Prim's
+    algorithm with a lazy binary heap over a CSR snapshot.
+
+    Arguments:
+    G -- an undirected graph, represented by adjacency lists, or a CSRGraph snapshot of one
+    r -- root vertex to start from
+    """
+    C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+    if C.is_directed():
+        raise RuntimeError("Graph should be undirected.")
+    pi, key = prim_forest(C, r)
+    mst = AdjacencyListGraph(C.get_card_V(), False, True)
+    for i in range(C.get_card_V()):
+        # Insert edges from vertices and their predecessors.
+        if pi[i] is not None:
+            mst.insert_edge(pi[i], i, key[i])
+    return mst
+
+
 def get_total_weight(G):
     """Return the total weight of edges in an undirected graph G."""
     total_weight = 0
@@ -204,3 +403,60 @@ if __name__ == "__main__":
     prim_weight2 = get_total_weight(prim2)
     print("Prim weight =", prim_weight2)
     print(prim_weight2 == kruskal_weight2)
+    print()
+
+    # Kruskal on edge arrays chooses the same edges.
+    print(kruskal_arrays(graph1).get_edge_list() == kruskal1.get_edge_list())
+    print(kruskal_arrays(graph2).get_edge_list() == kruskal2.get_edge_list())
+
+    # Timing on a larger graph.
+    import time
+    graph3 = generate_random_graph(1000, 0.1, True, False, True, 1, 30)
+    start = time.perf_counter()
+    kruskal3 = kruskal(graph3)
+    kruskal_time = time.perf_counter() - start
+    start = time.perf_counter()
+    u, v, weight = edge_arrays(graph3)
+    extract_time = time.perf_counter() - start
+    chosen = kruskal_edge_arrays(graph3.get_card_V(), u, v, weight)
+    arrays_time = time.perf_counter() - start
+    print(get_total_weight(kruskal3) == weight[chosen].sum())
+    print(f"{len(u)} edges: kruskal {kruskal_time:.2f} s, arrays {arrays_time:.3f} s"
+          f" ({extract_time:.3f} s of it extracting the edges)")
+    print()
+
+    # Boruvka's algorithm finds the same edges as Kruskal's.
+    print(sorted(boruvka(graph1).get_edge_list()) == sorted(kruskal1.get_edge_list()))
+    print(get_total_weight(boruvka(graph2)) == kruskal_weight2 == prim_weight2)
+    start = time.perf_counter()
+    boruvka3 = boruvka_edge_arrays(graph3.get_card_V(), u, v, weight)
+    boruvka_time = time.perf_counter() - start
+    print(np.array_equal(np.sort(boruvka3), np.sort(chosen)),
+          np.array_equal(np.sort(boruvka_edge_arrays(graph3.get_card_V(), u, v, weight, processes=2)), np.sort(chosen)))
+    print(f"Boruvka on the edge arrays: {boruvka_time:.3f} s")
+
+    # A disconnected graph gives a spanning forest.
+    graph4 = generate_random_graph(200, 0.005, True, False, True, 0, 3)
+    print(sorted(boruvka(graph4).get_edge_list()) == sorted(kruskal(graph4).get_edge_list()))
+    print(get_total_weight(prim_lazy(graph4)) == get_total_weight(kruskal(graph4)),
+          prim_lazy(graph4).get_card_E() == kruskal(graph4).get_card_E())
+    print()
+
+    # Benchmark the lazy Prim against prim and kruskal on dense and sparse graphs.
+    print(get_total_weight(prim_lazy(graph1)) == kruskal_weight, get_total_weight(prim_lazy(graph2)) == kruskal_weight2)
+    for name, card_V, probability in [("dense", 400, 0.5), ("sparse", 4000, 0.002)]:
+        graph5 = generate_random_graph(card_V, probability, True, False, True, 1, 100)
+        times = {}
+        weights = {}
+        for algorithm in [prim, kruskal, kruskal_arrays, prim_lazy]:
+            start = time.perf_counter()
+            tree = algorithm(graph5, 0) if algorithm is prim else algorithm(graph5)
+            times[algorithm.__name__] = time.perf_counter() - start
+            weights[algorithm.__name__] = get_total_weight(tree)
+        csr5 = CSRGraph(graph5)
+        start = time.perf_counter()
+        prim_forest(csr5)
+        times["prim_forest on a prebuilt snapshot"] = time.perf_counter() - start
+        print(name, graph5.get_card_E(), "edges, equal weights:", len(set(weights.values())) == 1)
+        for algorithm, seconds in times.items():
+            print(f"    {algorithm}: {seconds:.3f} s")
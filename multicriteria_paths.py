@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# multicriteria_paths.py
+
+from heapq import heappush, heappop
+
+
+def _labels_to_path(label, vertex_of, parent_of):
+	"""Follow parent labels back to the source and return the path of vertices."""
+	path = []
+	while label is not None:
+		path.append(vertex_of[label])
+		label = parent_of[label]
+	path.reverse()
+	return path
+
+
+def pareto_paths(C, s, t):
+	"""Find the Pareto-optimal (travel time, number of stops) routes from s to t.
+
+	A label-setting search in one pass over one graph: each label carries both the
+	travel time, taken from the edge weights, and the number of stops, which is the
+	number of edges used.  Labels are settled in lexicographic (time, stops) order,
+	so a label is dominated exactly when its vertex already has a settled label with
+	no more stops.  Labels that cannot beat a route to t already found are pruned.
+
+	Arguments:
+	C -- a CSRGraph with nonnegative weights
+	s -- index of source vertex
+	t -- index of target vertex
+	Returns:
+	A list of (time, stops, path) tuples, fastest first; stops strictly decrease
+	along the list.  Empty if t is unreachable.
+	"""
+	offsets, heads, weights = C.offsets, C.heads, C.weights
+	inf = float('inf')
+	best_stops = [inf] * C.get_card_V()  # fewest stops among the settled labels of each vertex
+	vertex_of, parent_of = [s], [None]
+	queue = [(0, 0, 0)]  # (time, stops, label)
+	routes = []
+
+	while queue:
+		time, stops, label = heappop(queue)
+		u = vertex_of[label]
+		if stops >= best_stops[u] or stops >= best_stops[t]:  # dominated
+			continue
+		best_stops[u] = stops
+		if u == t:
+			routes.append((time, stops, _labels_to_path(label, vertex_of, parent_of)))
+			continue
+		for i in range(offsets[u], offsets[u + 1]):
+			v = heads[i]
+			if stops + 1 < best_stops[v] and stops + 1 < best_stops[t]:
+				vertex_of.append(v)
+				parent_of.append(label)
+				heappush(queue, (time + weights[i], stops + 1, len(vertex_of) - 1))
+
+	return routes
+
+
+def lexicographic_path(C, s, t, fewest_stops_first=False):
+	"""Find the fastest route from s to t, breaking ties by fewest stops, or with
+	fewest_stops_first, the route with fewest stops, breaking ties by travel time.
+
+	Arguments:
+	C -- a CSRGraph with nonnegative weights
+	s -- index of source vertex
+	t -- index of target vertex
+	fewest_stops_first -- whether stops take priority over travel time
+	Returns:
+	A (time, stops, path) tuple, or None if t is unreachable
+	"""
+	offsets, heads, weights = C.offsets, C.heads, C.weights
+	card_V = C.get_card_V()
+	best = [None] * card_V
+	best[s] = (0, 0)
+	pi = [None] * card_V
+	settled = bytearray(card_V)
+	queue = [(0, 0, s)]
+
+	while queue:
+		first, second, u = heappop(queue)
+		if settled[u]:
+			continue
+		settled[u] = 1
+		if u == t:
+			path = [t]
+			while pi[path[-1]] is not None:
+				path.append(pi[path[-1]])
+			path.reverse()
+			return (second, first, path) if fewest_stops_first else (first, second, path)
+		for i in range(offsets[u], offsets[u + 1]):
+			v = heads[i]
+			key = (first + 1, second + weights[i]) if fewest_stops_first else (first + weights[i], second + 1)
+			if best[v] is None or key < best[v]:
+				best[v] = key
+				pi[v] = u
+				heappush(queue, (key[0], key[1], v))
+
+	return None
+
+
+# Testing
+if __name__ == "__main__":
+
+	from csr_graph import CSRGraph
+	from dijkstra import dijkstra_csr
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	def brute_force_front(G, s, t):
+		"""Return the Pareto front of (time, stops) over all simple paths, by enumeration."""
+		points = set()
+		stack = [(s, [s], 0)]
+		while stack:
+			u, path, time = stack.pop()
+			if u == t:
+				points.add((time, len(path) - 1))
+				continue
+			for edge in G.get_adj_list(u):
+				if edge.get_v() not in path:
+					stack.append((edge.get_v(), path + [edge.get_v()], time + edge.get_weight()))
+		return sorted(p for p in points if not any(q != p and q[0] <= p[0] and q[1] <= p[1] for q in points))
+
+	all_equal = True
+	for trial in range(30):
+		graph1 = generate_random_graph(9, 0.3, True, trial % 2 == 0, True, 1, 10)
+		csr1 = CSRGraph(graph1)
+		front = [(time, stops) for time, stops, _ in pareto_paths(csr1, 0, 8)]
+		if front != brute_force_front(graph1, 0, 8):
+			print("Mismatch in trial", trial)
+			all_equal = False
+	print("All Pareto fronts are " + ("not " if not all_equal else "") + "equal")
+
+	# On the tube network, the ends of the front match the separate Task 1a and Task 2a searches.
+	graph2, stations2 = load_london_underground()
+	csr2 = CSRGraph(graph2)
+	names = list(stations2)
+	s, t = stations2['Upminster'], stations2['Ealing Broadway']
+	routes = pareto_paths(csr2, s, t)
+	for time, stops, path in routes:
+		print(time, "minutes,", stops, "stops")
+	print(routes[0][0] == dijkstra_csr(csr2, s)[0][t])
+	print(routes[-1][1] == dijkstra_csr(CSRGraph(graph2, unit_weights=True), s)[0][t])
+	print(lexicographic_path(csr2, s, t)[:2], lexicographic_path(csr2, s, t, fewest_stops_first=True)[:2])
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# replacement_paths.py
+
+from closure_optimizer import ShortestPathForest
+
+
+def most_vital_edges(C, forest=None):
+	"""Rank the edges of a network by how much closing each one alone would lengthen
+	journeys, without an all-pairs computation per edge.
+
+	Closing an edge changes only the distances from sources whose shortest-path tree
+	uses it, and from each of those only the distances to the subtree below it.  So
+	for every source and every edge of its tree, the subtree alone is repaired, and
+	the increases are accumulated per edge.  Edges in no tree cost nothing.  In a
+	directed graph each direction is an edge of its own and is closed alone, whereas
+	evaluate_scenario in closure_scenarios closes both directions of a pair.
+
+	Arguments:
+	C -- a CSRGraph of the network, with nonnegative weights
+	forest -- optional ShortestPathForest of C, to reuse
+	Returns:
+	A list with one dictionary per edge, with its endpoints "u" and "v", the
+	"total_increase" in journey time over pairs that stay connected, the
+	"mean_increase" over all pairs connected before, the "worst_increase", the number
+	of "longer_pairs", and the number of "disconnected_pairs".  Edges that disconnect
+	the most pairs come first, then those with the largest total increase.
+	"""
+	if forest is None:
+		forest = ShortestPathForest(C)
+	card_E = C.get_card_E()
+	total = [0] * card_E
+	worst = [0] * card_E
+	longer = [0] * card_E
+	disconnected = [0] * card_E
+	pairs = 0
+	for s in range(C.get_card_V()):
+		d, tree_edge = forest.d[s], forest.tree_edge[s]
+		pairs += sum(1 for x, dx in enumerate(d) if x != s and dx < float('inf'))
+		for v, eid in enumerate(tree_edge):
+			if eid is None:
+				continue
+			for x, dx in forest.repair_subtree(s, v, eid).items():
+				if dx == float('inf'):
+					disconnected[eid] += 1
+				elif dx > d[x]:
+					increase = dx - d[x]
+					total[eid] += increase
+					longer[eid] += 1
+					if increase > worst[eid]:
+						worst[eid] = increase
+
+	table = []
+	for eid in range(card_E):
+		u, v = C.edge_endpoints(eid)
+		table.append({"u": u, "v": v, "total_increase": total[eid], "mean_increase": total[eid] / pairs if pairs else 0.0,
+					  "worst_increase": worst[eid], "longer_pairs": longer[eid], "disconnected_pairs": disconnected[eid]})
+	table.sort(key=lambda row: (-row["disconnected_pairs"], -row["total_increase"]))
+	return table
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	import numpy as np
+	from all_pairs_shortest_paths import all_pairs_distances
+	from csr_graph import CSRGraph
+	from generate_random_graph import generate_random_graph
+	from london_underground import load_london_underground
+
+	# Compare with closing each edge and recomputing all pairs.
+	all_equal = True
+	for directed in (True, False):
+		graph1 = generate_random_graph(25, 0.15, True, directed, True, 1, 10)
+		csr1 = CSRGraph(graph1)
+		before = all_pairs_distances(csr1)
+		connected = np.isfinite(before)
+		np.fill_diagonal(connected, False)
+		for row in most_vital_edges(csr1):
+			after = all_pairs_distances(csr1, edge_mask=csr1.mask_edges([(row["u"], row["v"])], both_directions=False))
+			still = connected & np.isfinite(after)
+			change = after[still] - before[still]
+			expected = (change.sum(), change.max() if change.size else 0, (change > 0).sum(),
+						connected.sum() - still.sum())
+			if (row["total_increase"], row["worst_increase"], row["longer_pairs"], row["disconnected_pairs"]) != expected:
+				all_equal = False
+	print("All replacement-path impacts are " + ("not " if not all_equal else "") + "equal")
+
+	# Rank the segments of the tube network.
+	graph2, stations2 = load_london_underground(directed=False)
+	names = list(stations2)
+	csr2 = CSRGraph(graph2)
+	start = time.perf_counter()
+	table = most_vital_edges(csr2)
+	print(f"{len(table)} segments ranked in {time.perf_counter() - start:.2f} s")
+	print("Most vital segments that keep the network connected:")
+	for row in [row for row in table if row["disconnected_pairs"] == 0][:10]:
+		print(f"    {names[row['u']]} -- {names[row['v']]}: mean +{row['mean_increase']:.3f}, "
+			  f"worst +{row['worst_increase']}, {row['longer_pairs']} longer journeys")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# route_cache.py
+
+from collections import OrderedDict
+from dijkstra import dijkstra
+
+
+class ShortestPathTreeCache:
+
+	def __init__(self, G, capacity=256, search=dijkstra):
+		"""Initialize a least-recently-used cache of shortest-path trees, keyed by source.
+
+		Each entry holds the d and pi lists of one source, so the cache holds at most
+		2 * capacity * |V| values.  The whole cache is dropped as soon as the version
+		counter of G changes, that is, after any insert_edge, delete_edge, or set_weight.
+		Callers share the cached lists and must not modify them.
+
+		Arguments:
+		G -- the graph that the trees are computed in
+		capacity -- maximum number of trees kept
+		search -- function taking G and a source vertex and returning d and pi
+		"""
+		if capacity < 1:
+			raise RuntimeError("Cache capacity must be at least 1.")
+		self.G = G
+		self.capacity = capacity
+		self.search = search
+		self.trees = OrderedDict()  # source -> (d, pi), least recently used first
+		self.version = G.get_version()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.invalidations = 0
+
+	def get(self, s):
+		"""Return d and pi for source s, computing and caching them on a miss."""
+		tree = self.lookup(s)
+		if tree is not None:
+			return tree
+		d, pi = self.search(self.G, s)
+		self.put(s, d, pi)
+		return d, pi
+
+	def lookup(self, s):
+		"""Return d and pi for source s if cached, otherwise None, counting a hit or a miss.
+		For callers that compute missing trees themselves and then put them."""
+		self.check_version()
+		tree = self.trees.get(s)
+		if tree is not None:
+			self.trees.move_to_end(s)
+			self.hits += 1
+			return tree
+		self.misses += 1
+		return None
+
+	def peek(self, s):
+		"""Return d and pi for source s if cached, otherwise None.  Does not count as a hit or miss."""
+		self.check_version()
+		return self.trees.get(s)
+
+	def put(self, s, d, pi, version=None):
+		"""Cache d and pi for source s, evicting the least recently used tree if full.
+
+		Arguments:
+		s -- source vertex
+		d, pi -- the shortest-path tree from s
+		version -- graph version the tree was computed for; the tree is dropped if stale
+		"""
+		self.check_version()
+		if version is not None and version != self.version:
+			return
+		self.trees[s] = (d, pi)
+		self.trees.move_to_end(s)
+		while len(self.trees) > self.capacity:
+			self.trees.popitem(last=False)
+			self.evictions += 1
+
+	def check_version(self):
+		"""Drop every cached tree if the graph has changed since they were computed."""
+		version = self.G.get_version()
+		if version != self.version:
+			self.invalidate()
+			self.version = version
+
+	def invalidate(self):
+		"""Drop every cached tree."""
+		if self.trees:
+			self.trees.clear()
+			self.invalidations += 1
+
+	def get_size(self):
+		"""Return the number of cached trees."""
+		return len(self.trees)
+
+	def get_stats(self):
+		"""Return a dictionary of hit, miss, eviction, and invalidation counts."""
+		lookups = self.hits + self.misses
+		return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+				"invalidations": self.invalidations, "size": len(self.trees),
+				"capacity": self.capacity, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+# Testing
+if __name__ == "__main__":
+
+	from random import Random
+	from generate_random_graph import generate_random_graph
+
+	card_V = 60
+	graph1 = generate_random_graph(card_V, 0.1, True, True, True, 1, 15)
+	cache1 = ShortestPathTreeCache(graph1, capacity=8)
+
+	# Skewed queries: most of them come from a few popular sources.
+	rng = Random(1)
+	all_equal = True
+	for _ in range(500):
+		s = rng.choice([0, 1, 2, 3]) if rng.random() < 0.9 else rng.randrange(card_V)
+		if cache1.get(s)[0] != dijkstra(graph1, s)[0]:
+			all_equal = False
+	print("All cached distances are " + ("not " if not all_equal else "") + "equal")
+	print(cache1.get_stats())
+
+	# Reweighting an edge invalidates the cache.
+	u, edge = next((u, edge) for u in range(card_V) for edge in graph1.get_adj_list(u))
+	graph1.set_weight(u, edge.get_v(), 0)
+	print(cache1.get(u)[0][edge.get_v()] == 0)
+	print(cache1.get_stats())
+
+	# A lookup counts a hit or a miss but never searches.
+	print(cache1.lookup(u) is not None, cache1.lookup(card_V - 1 if u != card_V - 1 else 0) is None, cache1.get_stats())
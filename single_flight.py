@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# single_flight.py
+
+import asyncio
+
+
+class SingleFlight:
+
+	def __init__(self):
+		"""Initialize a single-flight group, which runs at most one call per key at a time.
+
+		Callers that ask for a key whose call is still in flight wait for that call
+		instead of starting their own, and all of them receive the same result object,
+		or the same exception.  The call runs as its own task, so a waiter that is
+		cancelled, for example because its client disconnected, does not cancel it
+		for the others.  Once the call finishes the key is forgotten, so results
+		should be kept, if at all, by a cache in front of the group.
+		"""
+		self.calls = {}  # key -> task of the call in flight
+		self.leaders = 0
+		self.coalesced = 0
+
+	async def run(self, key, function, *args):
+		"""Return the result of awaiting function(*args), sharing a call in flight for key.
+
+		Arguments:
+		key -- hashable key identifying the call; include everything the result
+		depends on, such as the graph version
+		function -- coroutine function to call if no call for key is in flight
+		args -- arguments for function
+		"""
+		task = self.calls.get(key)
+		if task is None:
+			self.leaders += 1
+			task = asyncio.ensure_future(function(*args))
+			self.calls[key] = task
+			task.add_done_callback(lambda _: self.calls.pop(key, None))
+		else:
+			self.coalesced += 1
+		return await asyncio.shield(task)
+
+	def get_in_flight(self):
+		"""Return the number of calls in flight."""
+		return len(self.calls)
+
+	def get_stats(self):
+		"""Return a dictionary of the calls made, the callers that shared a call in flight,
+		and the calls in flight."""
+		return {"calls": self.leaders, "coalesced": self.coalesced, "in_flight": len(self.calls)}
+
+
+# Testing
+if __name__ == "__main__":
+
+	async def main():
+		group = SingleFlight()
+		started = []
+
+		async def search(s):
+			started.append(s)
+			await asyncio.sleep(0.01)
+			if s < 0:
+				raise RuntimeError("No such source.")
+			return [s] * 3
+
+		# 100 concurrent callers for 4 keys share 4 calls and their result objects.
+		results = await asyncio.gather(*(group.run(('v0', k % 4), search, k % 4) for k in range(100)))
+		print(sorted(started) == [0, 1, 2, 3], all(results[k] is results[k % 4] for k in range(100)))
+		print(group.get_stats())
+
+		# A finished call is forgotten, so the next caller calls again.
+		await group.run(('v0', 0), search, 0)
+		print(started.count(0) == 2)
+
+		# Exceptions reach every waiter.
+		outcomes = await asyncio.gather(*(group.run(('v0', -1), search, -1) for _ in range(3)), return_exceptions=True)
+		print(all(isinstance(outcome, RuntimeError) for outcome in outcomes), started.count(-1) == 1)
+
+		# Cancelling one waiter does not cancel the call for the others.
+		first = asyncio.ensure_future(group.run(('v0', 7), search, 7))
+		second = asyncio.ensure_future(group.run(('v0', 7), search, 7))
+		await asyncio.sleep(0)
+		first.cancel()
+		print(await second == [7, 7, 7], first.cancelled(), group.get_in_flight() == 0)
+
+	asyncio.run(main())
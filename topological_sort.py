@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# topological_sort.py
+
+from array import array
+from csr_graph import CSRGraph
+from dll_sentinel import DLLSentinel
+
+
+class CycleError(RuntimeError):
+
+	def __init__(self, cycle):
+		"""Error for a graph that was required to be acyclic.
+
+		Arguments:
+		cycle -- list of vertices on a cycle, each with an edge to the next and the last to the first
+		"""
+		RuntimeError.__init__(self, "Graph has a cycle: " + " -> ".join(str(v) for v in cycle + cycle[:1]))
+		self.cycle = cycle
+
+
+def topological_order(G):
+	"""Return the vertices of a directed acyclic graph in topologically sorted order,
+	using Kahn's algorithm.  Iterative, so there is no recursion-depth limit, and
+	linear time.  Raises CycleError, reporting one cycle, if the graph is not acyclic.
+
+	Arguments:
+	G -- a directed graph, implemented with adjacency lists, or a CSRGraph snapshot
+	Returns:
+	An array('l') of the vertex indices in topologically sorted order
+	"""
+	C = G if isinstance(G, CSRGraph) else CSRGraph(G)
+	card_V = C.get_card_V()
+	offsets, heads = C.offsets, C.heads
+
+	in_degree = array('l', [0]) * card_V
+	for v in heads:
+		in_degree[v] += 1
+
+	# The order array doubles as the FIFO queue of vertices with no remaining in-edges.
+	order = array('l', (v for v in range(card_V) if in_degree[v] == 0))
+	head = 0
+	while head < len(order):
+		u = order[head]
+		head += 1
+		for i in range(offsets[u], offsets[u + 1]):
+			v = heads[i]
+			in_degree[v] -= 1
+			if in_degree[v] == 0:
+				order.append(v)
+
+	if len(order) < card_V:
+		raise CycleError(_find_cycle(C, in_degree))
+	return order
+
+
+def _find_cycle(C, in_degree):
+	"""Return a cycle among the vertices that Kahn's algorithm could not remove.
+
+	Each such vertex still has an in-edge from another such vertex, so walking
+	backward along those in-edges must eventually repeat a vertex."""
+	xpose = C.transpose()
+	v = next(v for v in range(C.get_card_V()) if in_degree[v] > 0)
+	position = {}
+	walk = []
+	while v not in position:
+		position[v] = len(walk)
+		walk.append(v)
+		v = next(xpose.heads[i] for i in range(xpose.offsets[v], xpose.offsets[v + 1])
+				 if in_degree[xpose.heads[i]] > 0)
+	cycle = walk[position[v]:]
+	cycle.reverse()  # the walk followed edges backward
+	return cycle
+
+
+def topological_sort(G):
+	"""Return a linked list of the vertices of a directed acyclic graph in topologically
+	sorted order.  Raises CycleError if the graph is not acyclic."""
+	ordered = DLLSentinel()
+	for u in topological_order(G):
+		ordered.append(u)
+	return ordered
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from adjacency_list_graph import AdjacencyListGraph
+	from generate_random_graph import generate_random_graph
+
+	# Textbook example: getting dressed.
+	vertices = ['undershorts', 'pants', 'belt', 'shirt', 'tie', 'jacket', 'socks', 'shoes', 'watch']
+	edges = [('undershorts', 'pants'), ('undershorts', 'shoes'), ('pants', 'belt'), ('pants', 'shoes'),
+			 ('belt', 'jacket'), ('shirt', 'belt'), ('shirt', 'tie'), ('tie', 'jacket'), ('socks', 'shoes')]
+	graph1 = AdjacencyListGraph(len(vertices), True, False)
+	for edge in edges:
+		graph1.insert_edge(vertices.index(edge[0]), vertices.index(edge[1]))
+	order = topological_order(graph1)
+	print([vertices[u] for u in order])
+	position = {u: i for i, u in enumerate(order)}
+	print(all(position[vertices.index(a)] < position[vertices.index(b)] for a, b in edges))
+
+	# Add a cycle.
+	graph1.insert_edge(vertices.index('jacket'), vertices.index('shirt'))
+	try:
+		topological_order(graph1)
+	except CycleError as e:
+		print(e)
+		print([vertices[v] for v in e.cycle])
+
+	# Random DAGs: edges only go from lower to higher index, then relabel at random.
+	from random import shuffle
+	card_V = 200
+	labels = list(range(card_V))
+	shuffle(labels)
+	graph2 = AdjacencyListGraph(card_V, True, False)
+	for u, v in generate_random_graph(card_V, 0.05, True, False, False).get_edge_list():
+		graph2.insert_edge(labels[u], labels[v])
+	position = {u: i for i, u in enumerate(topological_order(graph2))}
+	print(all(position[u] < position[v] for u, v in graph2.get_edge_list()))
+
+	# A long chain, far deeper than the recursion limit.
+	card_V = 200000
+	graph3 = AdjacencyListGraph(card_V, True, False)
+	for u in range(card_V - 1):
+		graph3.insert_edge(u, u + 1)
+	start = time.perf_counter()
+	order = topological_order(graph3)
+	print(list(order[:5]), len(order), f"in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# yen_k_shortest_paths.py
+
+from heapq import heappush, heappop
+from csr_graph import CSRGraph
+from dijkstra import dijkstra_csr
+
+
+def yen_k_shortest_paths(G, s, t, K, C=None):
+	"""Find up to K shortest loopless paths from s to t with Yen's algorithm.
+
+	One shortest-path tree into t, computed on the reverse graph, is shared by all
+	spur searches.  When the tree path from a spur vertex avoids every masked edge
+	and root-path vertex, it is the spur path and no search is needed.  Otherwise
+	the spur search is an A* search that uses the tree distances as its heuristic
+	(masking edges can only lengthen paths, so they remain lower bounds) and stops
+	as soon as t is settled.  Edges and root-path vertices are excluded with masks
+	instead of copying the graph and deleting edges.
+
+	Arguments:
+	G -- a weighted graph with nonnegative weights, implemented with adjacency lists
+	s -- index of source vertex
+	t -- index of target vertex
+	K -- maximum number of paths to find
+	C -- optional CSRGraph snapshot of G, to avoid rebuilding it on every call
+	Returns:
+	A list of up to K (cost, path) tuples in nondecreasing order of cost, where
+	each path is a list of vertex indices from s to t
+	"""
+	if C is None:
+		C = CSRGraph(G)
+	card_V = C.get_card_V()
+	offsets, heads, weights, edge_ids = C.offsets, C.heads, C.weights, C.edge_ids
+
+	# Shortest-path tree into t: h[v] is the distance from v to t, succ[v] is v's next hop.
+	h, succ = dijkstra_csr(C.transpose() if C.is_directed() else C, t)
+	if h[s] == float('inf') or K <= 0:
+		return []
+
+	def tree_path(v):
+		path = [v]
+		while v != t:
+			v = succ[v]
+			path.append(v)
+		return path
+
+	def edge_slot(u, v):
+		for i in range(offsets[u], offsets[u + 1]):
+			if heads[i] == v:
+				return i
+
+	edge_mask = C.new_edge_mask()
+	vertex_mask = bytearray(card_V)
+
+	def tree_path_is_clear(v):
+		while v != t:
+			if vertex_mask[v] or edge_mask[edge_ids[edge_slot(v, succ[v])]]:
+				return False
+			v = succ[v]
+		return not vertex_mask[t]
+
+	def spur_search(spur):
+		# A* from the spur vertex, guided by the distances to t.
+		g = {spur: 0}
+		pi = {spur: None}
+		closed = set()
+		queue = [(h[spur], spur)]
+		while queue:
+			_, u = heappop(queue)
+			if u in closed:
+				continue
+			if u == t:
+				path = [t]
+				while pi[path[-1]] is not None:
+					path.append(pi[path[-1]])
+				path.reverse()
+				return g[t], path
+			closed.add(u)
+			gu = g[u]
+			for i in range(offsets[u], offsets[u + 1]):
+				v = heads[i]
+				if vertex_mask[v] or edge_mask[edge_ids[i]] or v in closed:
+					continue
+				gv = gu + weights[i]
+				if gv < g.get(v, float('inf')):
+					g[v] = gv
+					pi[v] = u
+					heappush(queue, (gv + h[v], v))
+		return None
+
+	first = tree_path(s)
+	found = [(h[s], first)]
+	candidates = []
+	seen = {tuple(first)}
+	counter = 0  # breaks ties between candidates of equal cost in order of discovery
+
+	while len(found) < K:
+		prev_path = found[-1][1]
+		root_cost = 0
+		for i in range(len(prev_path) - 1):
+			spur = prev_path[i]
+			root = prev_path[:i + 1]
+
+			# Mask the next edge of every found path that shares this root path.
+			masked = []
+			for _, path in found:
+				if len(path) > i + 1 and path[:i + 1] == root:
+					eid = edge_ids[edge_slot(path[i], path[i + 1])]
+					if not edge_mask[eid]:
+						edge_mask[eid] = 1
+						masked.append(eid)
+
+			if tree_path_is_clear(spur):
+				spur_result = h[spur], tree_path(spur)
+			else:
+				spur_result = spur_search(spur)
+
+			if spur_result is not None:
+				spur_cost, spur_path = spur_result
+				total_path = root[:-1] + spur_path
+				key = tuple(total_path)
+				if key not in seen:
+					seen.add(key)
+					heappush(candidates, (root_cost + spur_cost, counter, total_path))
+					counter += 1
+
+			for eid in masked:
+				edge_mask[eid] = 0
+			# The spur vertex becomes part of the root path for the next spur vertex.
+			vertex_mask[spur] = 1
+			root_cost += weights[edge_slot(spur, prev_path[i + 1])]
+
+		for v in prev_path:
+			vertex_mask[v] = 0
+		if not candidates:
+			break
+		cost, _, path = heappop(candidates)
+		found.append((cost, path))
+
+	return found
+
+
+# Testing
+if __name__ == "__main__":
+
+	import time
+	from adjacency_list_graph import AdjacencyListGraph
+	from generate_random_graph import generate_random_graph
+
+	def all_simple_path_costs(G, s, t):
+		"""Return the sorted costs of all simple paths from s to t, by brute force."""
+		costs = []
+		stack = [(s, [s], 0)]
+		while stack:
+			u, path, cost = stack.pop()
+			if u == t:
+				costs.append(cost)
+				continue
+			for edge in G.get_adj_list(u):
+				if edge.get_v() not in path:
+					stack.append((edge.get_v(), path + [edge.get_v()], cost + edge.get_weight()))
+		return sorted(costs)
+
+	# Textbook Dijkstra example.
+	vertices = ['s', 't', 'x', 'y', 'z']
+	edges = [('s', 't', 10), ('s', 'y', 5), ('t', 'x', 1), ('t', 'y', 2), ('x', 'z', 4),
+			('y', 't', 3), ('y', 'x', 9), ('y', 'z', 2), ('z', 's', 7), ('z', 'x', 6)]
+	graph1 = AdjacencyListGraph(len(vertices), True, True)
+	for edge in edges:
+		graph1.insert_edge(vertices.index(edge[0]), vertices.index(edge[1]), edge[2])
+	for cost, path in yen_k_shortest_paths(graph1, vertices.index('s'), vertices.index('x'), 4):
+		print(cost, [vertices[v] for v in path])
+	print()
+
+	# Costs should match brute-force enumeration of simple paths.
+	all_equal = True
+	for trial in range(20):
+		graph2 = generate_random_graph(9, 0.35, True, trial % 2 == 0, True, 1, 10)
+		expected = all_simple_path_costs(graph2, 0, 8)[:6]
+		paths = yen_k_shortest_paths(graph2, 0, 8, 6)
+		if [cost for cost, _ in paths] != expected or len({tuple(p) for _, p in paths}) != len(paths):
+			print("Mismatch in trial", trial)
+			all_equal = False
+	print("All K-shortest path costs are " + ("not " if not all_equal else "") + "equal")
+
+	# Timing on the tube network.
+	import pandas as pd
+	df = pd.read_csv('london_underground_graph.csv')
+	stations = {station: idx for idx, station in enumerate(pd.unique(df[['Station A', 'Station B']].values.ravel('K')))}
+	graph3 = AdjacencyListGraph(len(stations), True, True)
+	for _, row in df.iterrows():
+		graph3.insert_edge(stations[row['Station A']], stations[row['Station B']], row['Travel Time (minutes)'])
+	names = list(stations)
+	csr3 = CSRGraph(graph3)
+	start = time.perf_counter()
+	paths = yen_k_shortest_paths(graph3, stations['Upminster'], stations['Ealing Broadway'], 5, csr3)
+	elapsed = time.perf_counter() - start
+	for cost, path in paths:
+		print(cost, len(path) - 1, "stops:", names[path[0]], "->", names[path[-1]])
+	print(f"k = 5 in {elapsed * 1e3:.2f} ms")